@@ -1,10 +1,32 @@
+import os
+import re
 import sys
 import json
-import subprocess
 import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
+from osxphotos import PhotosDB
+from tqdm import tqdm
 from remove_duplicates import apply_threshold
 
+# One anchored alternation matches every removable name
+METADATA_PATTERN = re.compile(r"^\._|^\.DS_Store$")
+METADATA_OR_VIDEO_PATTERN = re.compile(r"^\._|^\.DS_Store$|(?i:\.(?:mov|mp4))$")
+
+
+def _walk_files(root):
+    """Yields a DirEntry for every file below root, scanning each directory once."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    yield entry
+
 
 def cleanup_metadata_files(image_dir, dry_run=False, remove_videos=False):
     """Recursively remove macOS metadata files (._*, .DS_Store) and optionally video files."""
@@ -13,15 +35,16 @@ def cleanup_metadata_files(image_dir, dry_run=False, remove_videos=False):
     if not image_dir.is_dir():
         raise NotADirectoryError(f"Directory not found: {image_dir}")
 
-    # Collect files to remove
-    files_to_remove = list(image_dir.rglob("._*")) + list(image_dir.rglob(".DS_Store"))
+    pattern = METADATA_OR_VIDEO_PATTERN if remove_videos else METADATA_PATTERN
 
-    if remove_videos:
-        video_extensions = (".mov", ".mp4", ".MOV", ".MP4")
-        for ext in video_extensions:
-            files_to_remove.extend(image_dir.rglob(f"*{ext}"))
-
-    files_to_remove = sorted(list(set(files_to_remove)))
+    # Collect files to remove and their sizes in a single walk
+    files_to_remove = []
+    for entry in _walk_files(image_dir):
+        if pattern.search(entry.name):
+            try:
+                files_to_remove.append((entry.path, entry.stat().st_size))
+            except OSError as e:
+                print(f"    Error reading size of {entry.path}: {e}")
 
     if not files_to_remove:
         print(f"No metadata or video files found in {image_dir}")
@@ -33,14 +56,13 @@ def cleanup_metadata_files(image_dir, dry_run=False, remove_videos=False):
     )
 
     total_size = 0
-    for file_path in files_to_remove:
+    for file_path, size in files_to_remove:
         try:
-            size = file_path.stat().st_size
-            total_size += size
             if not dry_run:
-                file_path.unlink()
+                os.unlink(file_path)
+            total_size += size
         except Exception as e:
-            print(f"    Error removing {file_path.name}: {e}")
+            print(f"    Error removing {os.path.basename(file_path)}: {e}")
 
     total_mb = total_size / (1024 * 1024)
     if not dry_run:
@@ -49,6 +71,66 @@ def cleanup_metadata_files(image_dir, dry_run=False, remove_videos=False):
         print(f"\nWould free {total_mb:.2f} MB")
 
 
+def export_photos(
+    library_path, export_dir, from_date=None, to_date=None, dry_run=False
+):
+    """Export located photos (edited version when present) from a Photos library.
+
+    Mirrors `osxphotos export --location --only-photos --skip-original-if-edited
+    --skip-live --skip-bursts`, but runs in-process and copies files in parallel.
+    """
+    db = PhotosDB(dbfile=library_path)
+    photos = db.photos(
+        images=True,
+        movies=False,
+        from_date=datetime.fromisoformat(from_date) if from_date else None,
+        to_date=datetime.fromisoformat(to_date) if to_date else None,
+    )
+
+    # Pick the source for each photo and reserve a unique file name up front, so
+    # parallel exports never race for the same destination
+    jobs = []
+    name_counts = Counter()
+    missing = 0
+    for photo in photos:
+        if photo.location == (None, None):
+            continue
+        edited = photo.hasadjustments and photo.path_edited is not None
+        source = photo.path_edited if edited else photo.path
+        if source is None:
+            missing += 1
+            continue
+        stem, suffix = Path(photo.original_filename).stem, Path(source).suffix
+        key = (stem + suffix).lower()
+        n = name_counts[key]
+        name_counts[key] += 1
+        filename = f"{stem} ({n}){suffix}" if n else f"{stem}{suffix}"
+        jobs.append((photo, filename, edited))
+
+    print(f"Found {len(jobs)} photos to export ({missing} missing locally).")
+    if dry_run or not jobs:
+        return 0
+
+    exported = 0
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {
+            executor.submit(
+                photo.export, str(export_dir), filename, edited=edited
+            ): filename
+            for photo, filename, edited in jobs
+        }
+        for future in tqdm(
+            as_completed(futures), total=len(futures), desc="Exporting", unit="photo"
+        ):
+            try:
+                exported += len(future.result())
+            except Exception as e:
+                tqdm.write(f"    Error exporting {futures[future]}: {e}")
+
+    print(f"Exported {exported} photos to {export_dir}")
+    return exported
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Export images from macOS Photos and deduplicate."
@@ -93,28 +175,13 @@ def main():
     export_dir = Path(args.export_path).expanduser()
     export_dir.mkdir(parents=True, exist_ok=True)
 
-    command = [
-        "uv",
-        "run",
-        "osxphotos",
-        "export",
-        args.export_path,
-        "--library",
+    export_photos(
         args.library_path,
-        "--location",
-        "--only-photos",
-        "--skip-original-if-edited",
-        "--skip-live",
-        "--skip-bursts",
-    ]
-    if args.from_date:
-        command.extend(["--from-date", args.from_date])
-    if args.to_date:
-        command.extend(["--to-date", args.to_date])
-    if args.dry_run:
-        command.append("--dry-run")
-
-    subprocess.run(command)
+        export_dir,
+        from_date=args.from_date,
+        to_date=args.to_date,
+        dry_run=args.dry_run,
+    )
 
     # Clean up metadata files
     print("\nStarting metadata cleanup...")
@@ -1,13 +1,29 @@
 from pathlib import Path
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+import io
+import os
 import json
+import struct
+import orjson
 import argparse
 import torch
-from PIL import Image, ExifTags
+import torch.nn.functional as F
+from PIL import Image
 from tqdm import tqdm
-from datetime import datetime
 import math
+import numpy as np
 from aesthetic_predictor_v2_5 import convert_v2_5_from_siglip
 
+# Number of batches decoded ahead of the batch currently on the model
+PREFETCH_BATCHES = 2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".heic", ".webp")
+
+# GPS reference letters for southern latitudes and western longitudes
+_NEG_REFS = frozenset({"S", "W"})
+
 
 def get_device():
     """Detects and returns the best available torch device."""
@@ -21,15 +37,13 @@ def get_device():
 def get_decimal_from_dms(dms, ref):
     """Converts DMS (degrees, minutes, seconds) to decimal degrees."""
     degrees, minutes, seconds = dms[0], dms[1] / 60.0, dms[2] / 3600.0
-    sign = -1 if ref in ["S", "W"] else 1
+    sign = -1 if ref in _NEG_REFS else 1
     return sign * (degrees + minutes + seconds)
 
 
-def get_exif_location(image_path):
-    """Extracts GPS latitude and longitude from image EXIF data."""
+def get_exif_location(exifdata):
+    """Extracts GPS latitude and longitude from parsed EXIF data."""
     try:
-        image = Image.open(image_path)
-        exifdata = image.getexif()
         if not exifdata:
             return None, None
 
@@ -37,12 +51,11 @@ def get_exif_location(image_path):
         if not gps_ifd:
             return None, None
 
-        gps_data = {ExifTags.GPSTAGS.get(key, key): val for key, val in gps_ifd.items()}
-
-        lat_data = gps_data.get("GPSLatitude")
-        lon_data = gps_data.get("GPSLongitude")
-        lat_ref = gps_data.get("GPSLatitudeRef")
-        lon_ref = gps_data.get("GPSLongitudeRef")
+        # GPS IFD tags: 1/2 latitude ref/value, 3/4 longitude ref/value
+        lat_data = gps_ifd.get(2)
+        lon_data = gps_ifd.get(4)
+        lat_ref = gps_ifd.get(1)
+        lon_ref = gps_ifd.get(3)
 
         if lat_data and lon_data and lat_ref and lon_ref:
             lat = get_decimal_from_dms(lat_data, lat_ref)
@@ -53,41 +66,303 @@ def get_exif_location(image_path):
     return None, None
 
 
-def get_exif_datetime(image_path):
-    """Extracts the original or creation datetime from image EXIF data."""
+def get_exif_datetime(exifdata):
+    """Extracts the original or creation datetime from parsed EXIF data."""
     try:
-        image = Image.open(image_path)
-        exifdata = image.getexif()
         if not exifdata:
             return None
 
-        # Tag 36867 is DateTimeOriginal, 306 is DateTime
-        datetime_str = exifdata.get(36867) or exifdata.get(306)
+        # DateTimeOriginal (36867) lives in the Exif IFD (0x8769); fall back
+        # to the top-level DateTime (306), which is the modification time
+        datetime_str = exifdata.get_ifd(0x8769).get(36867) or exifdata.get(306)
         if datetime_str:
-            return datetime.strptime(datetime_str, "%Y:%m:%d %H:%M:%S").isoformat()
+            return exif_datetime_to_iso(datetime_str)
     except Exception:
         return None
     return None
 
 
+def exif_datetime_to_iso(datetime_str):
+    """Converts an EXIF 'YYYY:MM:DD HH:MM:SS' string to ISO format.
+
+    EXIF datetimes have a fixed layout, so slicing replaces strptime. Blank
+    or zeroed values ('0000:00:00 ...') written by unset camera clocks are
+    rejected.
+    """
+    s = datetime_str
+    if (
+        len(s) < 19
+        or s[4] != ":"
+        or s[7] != ":"
+        or not (s[:4] + s[5:7] + s[8:10]).isdigit()
+        or s[:4] == "0000"
+        or not "01" <= s[5:7] <= "12"
+        or not "01" <= s[8:10] <= "31"
+    ):
+        return None
+    return f"{s[:4]}-{s[5:7]}-{s[8:10]}T{s[11:19]}"
+
+
+def _jpeg_exif(f):
+    """Scans JPEG marker segments up to start-of-scan for the EXIF APP1 segment."""
+    while True:
+        header = f.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return b""
+        marker, length = header[1], struct.unpack(">H", header[2:])[0]
+        if marker == 0xDA:  # Start of scan, no metadata segments follow
+            return b""
+        if marker == 0xE1:
+            segment = f.read(length - 2)
+            if segment.startswith(b"Exif\x00\x00"):
+                return segment[6:]
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def _png_exif(f):
+    """Scans PNG chunks for the eXIf chunk."""
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return b""
+        length, chunk_type = struct.unpack(">I4s", header)
+        if chunk_type == b"eXIf":
+            return f.read(length)
+        if chunk_type == b"IEND":
+            return b""
+        f.seek(length + 4, os.SEEK_CUR)  # chunk data + CRC
+
+
+def _webp_exif(f):
+    """Scans WebP RIFF chunks for the EXIF chunk."""
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return b""
+        chunk_type, length = struct.unpack("<4sI", header)
+        if chunk_type == b"EXIF":
+            payload = f.read(length)
+            # Some encoders keep the JPEG-style APP1 prefix
+            return payload[6:] if payload.startswith(b"Exif\x00\x00") else payload
+        f.seek(length + (length & 1), os.SEEK_CUR)  # chunks are padded to even size
+
+
+def read_exif_payload(data):
+    """Returns the raw TIFF-format EXIF block of an encoded JPEG, PNG or WebP.
+
+    Returns b"" if the image has no EXIF block, or None for other formats so
+    the caller can fall back to PIL.
+    """
+    with io.BytesIO(data) as f:
+        head = f.read(12)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _jpeg_exif(f)
+        if head[:8] == b"\x89PNG\r\n\x1a\n":
+            f.seek(8)
+            return _png_exif(f)
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webp_exif(f)
+    return None
+
+
+def _read_ifd(tiff, offset, endian):
+    """Maps each tag of a TIFF IFD to its (type, count, raw value) entry."""
+    (count,) = struct.unpack_from(endian + "H", tiff, offset)
+    return {
+        tag: (typ, n, value)
+        for tag, typ, n, value in (
+            struct.unpack_from(endian + "HHI4s", tiff, offset + 2 + 12 * i)
+            for i in range(count)
+        )
+    }
+
+
+def _ifd_offset(entry, endian):
+    return struct.unpack(endian + "I", entry[2])[0]
+
+
+def _ifd_ascii(tiff, entry, endian):
+    _, n, value = entry
+    if n > 4:
+        offset = _ifd_offset(entry, endian)
+        value = tiff[offset : offset + n]
+    return value[:n].split(b"\x00", 1)[0].decode("ascii", "replace").strip()
+
+
+def _ifd_dms(tiff, entry, endian):
+    """Reads a GPS (degrees, minutes, seconds) rational triple as decimal degrees."""
+    typ, n, _ = entry
+    if typ not in (5, 10) or n != 3:
+        return None
+    parts = struct.unpack_from(
+        endian + ("i" if typ == 10 else "I") * 6, tiff, _ifd_offset(entry, endian)
+    )
+    d, m, s = (num / den if den else 0.0 for num, den in zip(parts[::2], parts[1::2]))
+    return d + m / 60.0 + s / 3600.0
+
+
+def extract_exif_fast(data):
+    """Reads GPS location and datetime straight from an image's raw EXIF block.
+
+    Returns (lat, lng, iso_datetime, date_str), or None if the format is not
+    handled by read_exif_payload so the caller can fall back to PIL.
+    """
+    tiff = read_exif_payload(data)
+    if tiff is None:
+        return None
+
+    lat = lng = datetime_str = None
+    try:
+        if tiff[:2] not in (b"II", b"MM"):
+            return None, None, None, None
+        endian = "<" if tiff[:2] == b"II" else ">"
+        ifd0 = _read_ifd(tiff, struct.unpack_from(endian + "I", tiff, 4)[0], endian)
+
+        # Tag 0x8769 points to the Exif IFD holding DateTimeOriginal (0x9003)
+        if 0x8769 in ifd0:
+            exif_ifd = _read_ifd(tiff, _ifd_offset(ifd0[0x8769], endian), endian)
+            if 0x9003 in exif_ifd:
+                datetime_str = _ifd_ascii(tiff, exif_ifd[0x9003], endian)
+        if not datetime_str and 0x0132 in ifd0:
+            datetime_str = _ifd_ascii(tiff, ifd0[0x0132], endian)
+
+        # GPS IFD tags: 1/2 latitude ref/value, 3/4 longitude ref/value
+        if 0x8825 in ifd0:
+            gps = _read_ifd(tiff, _ifd_offset(ifd0[0x8825], endian), endian)
+            if all(tag in gps for tag in (1, 2, 3, 4)):
+                lat = _ifd_dms(tiff, gps[2], endian)
+                lng = _ifd_dms(tiff, gps[4], endian)
+                if lat is not None and lng is not None:
+                    lat *= -1 if _ifd_ascii(tiff, gps[1], endian) in _NEG_REFS else 1
+                    lng *= -1 if _ifd_ascii(tiff, gps[3], endian) in _NEG_REFS else 1
+                else:
+                    lat = lng = None
+    except (struct.error, ValueError):
+        pass
+
+    iso_datetime = exif_datetime_to_iso(datetime_str) if datetime_str else None
+    date_str = iso_datetime[:10] if iso_datetime else None
+    return lat, lng, iso_datetime, date_str
+
+
+def load_image(path, pin_memory=False):
+    """Decodes an image once, returning it as RGB with its EXIF location and dates.
+
+    The file is read a single time and the same buffer feeds both the EXIF
+    parser and PIL. With pin_memory the pixels come back as an (H, W, 3)
+    uint8 tensor in page-locked memory, so the copy to the GPU can overlap.
+    """
+    data = Path(path).read_bytes()
+    exif = extract_exif_fast(data)
+    with Image.open(io.BytesIO(data)) as image:
+        if exif is None:
+            exifdata = image.getexif()
+            lat, lng = get_exif_location(exifdata)
+            datetime_str = get_exif_datetime(exifdata)
+            date_str = datetime_str[:10] if datetime_str else None
+            exif = (lat, lng, datetime_str, date_str)
+        rgb_image = image.convert("RGB")
+    if pin_memory:
+        # Copy straight into the pinned buffer on this worker thread
+        pinned = torch.empty(
+            (rgb_image.height, rgb_image.width, 3), dtype=torch.uint8, pin_memory=True
+        )
+        pinned.numpy()[:] = np.asarray(rgb_image)
+        rgb_image = pinned
+    return (rgb_image, *exif)
+
+
+def preprocess_on_device(images, preprocessor, device):
+    """Resizes and normalizes a batch of pinned (H, W, 3) uint8 images on device.
+
+    Mirrors the SigLIP image processor (bicubic resize, rescale, normalize) so
+    the per-image resize runs on the GPU instead of in PIL on the CPU.
+    """
+    processor = getattr(preprocessor, "image_processor", preprocessor)
+    size = (processor.size["height"], processor.size["width"])
+    mean = torch.tensor(processor.image_mean, device=device).view(1, 3, 1, 1)
+    std = torch.tensor(processor.image_std, device=device).view(1, 3, 1, 1)
+
+    resized = []
+    for img in images:
+        pixels = img.to(device, non_blocking=True)
+        pixels = pixels.permute(2, 0, 1).unsqueeze(0).float()
+        resized.append(F.interpolate(pixels, size=size, mode="bicubic", antialias=True))
+    batch = torch.cat(resized).clamp_(0, 255) * processor.rescale_factor
+    return (batch - mean) / std
+
+
+def iter_images(root):
+    """Yields image file paths below root, skipping hidden and macOS metadata files."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name[0] != "." and entry.name.lower().endswith(
+                    IMAGE_EXTENSIONS
+                ):
+                    yield entry.path
+
+
+def get_checkpoint_file(output_file):
+    """Returns the append-only JSONL checkpoint path for a results file."""
+    return output_file.with_suffix(".jsonl")
+
+
 def load_existing_results(output_file):
-    """Loads existing results from a JSON file, if available."""
-    if not output_file.exists():
-        return {"images": [], "metadata": {}}
+    """Loads existing results from a JSON file plus any JSONL checkpoint records.
+
+    Records are keyed by absolute path, so a checkpoint left behind by a run
+    that stopped after saving the JSON does not duplicate its images.
+    """
+    existing_results = {"images": [], "metadata": {}}
+    if output_file.exists():
+        try:
+            existing_results = orjson.loads(output_file.read_bytes())
+        except Exception as e:
+            print(f"Warning: Could not load {output_file}: {e}")
+
+    checkpoint_file = get_checkpoint_file(output_file)
+    if checkpoint_file.exists():
+        images = {
+            os.path.abspath(img["path"]): img
+            for img in existing_results.get("images", [])
+        }
+        with open(checkpoint_file, "rb") as f:
+            for line in f:
+                try:
+                    img = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Truncated last line from an interrupted run
+                    continue
+                images[os.path.abspath(img["path"])] = img
+        existing_results["images"] = list(images.values())
+    return existing_results
+
+
+def ends_mid_line(path):
+    """Returns True if a file is non-empty and its last line is unterminated."""
     try:
-        with open(output_file, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Warning: Could not load {output_file}: {e}")
-        return {"images": [], "metadata": {}}
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    except OSError:  # Missing or empty file
+        return False
 
 
 def save_results(output_file, results, metadata):
     """Saves results and metadata to a JSON file atomically."""
     output_data = {"images": results, "metadata": metadata}
     temp_file = output_file.with_suffix(".json.tmp")
-    with open(temp_file, "w") as f:
-        json.dump(output_data, f, indent=2)
+    temp_file.write_bytes(
+        orjson.dumps(
+            output_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+        )
+    )
     temp_file.replace(output_file)
 
 
@@ -124,20 +399,22 @@ def compute_score_bins(scores, bins=10):
     step = nicenum(raw_step)
     lower = math.floor(smin / step) * step
 
+    arr = np.asarray(scores, dtype=np.float64)
+    idx = np.clip(((arr - lower) / step).astype(np.int64), 0, bins - 1)
+    idx[arr == smax] = bins - 1
+    counts = np.bincount(idx, minlength=bins)
+    cumulative = np.cumsum(counts)
+
     ranges = [
-        {"min": lower + i * step, "max": lower + (i + 1) * step, "count": 0}
-        for i in range(bins)
+        {
+            "min": lower + i * step,
+            "max": lower + (i + 1) * step,
+            "count": int(count),
+            "cumulative": int(cum),
+        }
+        for i, (count, cum) in enumerate(zip(counts, cumulative))
     ]
 
-    for s in scores:
-        idx = min(bins - 1, max(0, int((s - lower) / step))) if s != smax else bins - 1
-        ranges[idx]["count"] += 1
-
-    cum = 0
-    for r in ranges:
-        cum += r["count"]
-        r["cumulative"] = cum
-
     return {"ranges": ranges, "step": step, "lower": lower}
 
 
@@ -152,12 +429,12 @@ def process_images_in_batches(
     existing_results,
 ):
     """Processes images in batches to get aesthetic scores and EXIF data."""
+    # image_paths are absolute strings; abspath normalizes older relative entries
+    # without the per-component lstat calls of Path.resolve
     processed_paths = {
-        str(Path(img["path"]).resolve()) for img in existing_results.get("images", [])
+        os.path.abspath(img["path"]) for img in existing_results.get("images", [])
     }
-    remaining_paths = [
-        p for p in image_paths if str(p.resolve()) not in processed_paths
-    ]
+    remaining_paths = [p for p in image_paths if p not in processed_paths]
 
     if processed_paths and remaining_paths:
         print(
@@ -169,86 +446,114 @@ def process_images_in_batches(
     results = existing_results.get("images", []).copy()
     skipped_images = []
 
-    with tqdm(
-        total=len(remaining_paths), desc="Processing images", unit="img", ncols=100
-    ) as progress_bar:
-        for i in range(0, len(remaining_paths), batch_size):
-            batch_paths = remaining_paths[i : i + batch_size]
-            batch_images, valid_paths = [], []
-            for path in batch_paths:
+    batches = [
+        remaining_paths[i : i + batch_size]
+        for i in range(0, len(remaining_paths), batch_size)
+    ]
+
+    # New results are appended one line each; main() compacts them into output_file
+    checkpoint = nullcontext()
+    if output_file:
+        checkpoint_file = get_checkpoint_file(output_file)
+        torn = ends_mid_line(checkpoint_file)
+        checkpoint = open(checkpoint_file, "ab")
+        if torn:
+            # New entries start on a fresh line after a torn last write
+            checkpoint.write(b"\n")
+    with (
+        torch.inference_mode(),
+        checkpoint as checkpoint_fp,
+        ThreadPoolExecutor(max_workers=os.cpu_count()) as executor,
+        tqdm(
+            total=len(remaining_paths), desc="Processing images", unit="img", ncols=100
+        ) as progress_bar,
+    ):
+        # Workers decode images and read EXIF while the model scores the current
+        # batch; on CUDA they also pin the pixels for the non-blocking upload
+        pin = device.type == "cuda"
+        pending = deque(
+            [executor.submit(load_image, path, pin) for path in batch]
+            for batch in batches[:PREFETCH_BATCHES]
+        )
+        for batch_idx, batch_paths in enumerate(batches):
+            futures = pending.popleft()
+            if batch_idx + PREFETCH_BATCHES < len(batches):
+                pending.append(
+                    [
+                        executor.submit(load_image, path, pin)
+                        for path in batches[batch_idx + PREFETCH_BATCHES]
+                    ]
+                )
+
+            batch_images, batch_exif, valid_paths = [], [], []
+            for path, future in zip(batch_paths, futures):
                 try:
-                    batch_images.append(Image.open(path).convert("RGB"))
+                    rgb_image, *exif = future.result()
+                    batch_images.append(rgb_image)
+                    batch_exif.append(exif)
                     valid_paths.append(path)
                 except Exception as e:
-                    skipped_images.append(str(path))
-                    if not path.name.startswith("._"):
-                        progress_bar.write(f"Warning: Skipping {path.name}: {e}")
+                    skipped_images.append(path)
+                    progress_bar.write(
+                        f"Warning: Skipping {os.path.basename(path)}: {e}"
+                    )
 
             if not batch_images:
                 progress_bar.update(len(batch_paths))
                 continue
 
-            pixel_values = (
-                preprocessor(images=batch_images, return_tensors="pt")
-                .pixel_values.to(torch.bfloat16)
-                .to(device)
-            )
-            with torch.inference_mode():
-                scores = model(pixel_values).logits.squeeze().float().cpu().numpy()
-
-            scores = scores.tolist() if scores.ndim > 0 else [scores.item()]
-
-            for path, score in zip(valid_paths, scores):
-                lat, lng = get_exif_location(path)
-                datetime_str = get_exif_datetime(path)
-                date_str = (
-                    datetime_str.split("T")[0]
-                    if datetime_str and "T" in datetime_str
-                    else None
-                )
-
-                results.append(
-                    {
-                        "filename": path.name,
-                        "path": str(path),
-                        "score": float(score),
-                        "lat": lat,
-                        "lng": lng,
-                        "timestamp": datetime_str,
-                        "date": date_str,
-                    }
+            if pin:
+                pixel_values = preprocess_on_device(batch_images, preprocessor, device)
+                # Pad short batches so the compiled graph always sees one shape
+                pad = batch_size - len(batch_images)
+                if pad > 0:
+                    pixel_values = torch.cat(
+                        [pixel_values, pixel_values[-1:].expand(pad, -1, -1, -1)]
+                    )
+                pixel_values = pixel_values.to(
+                    dtype=torch.bfloat16, memory_format=torch.channels_last
                 )
+            else:
+                pixel_values = preprocessor(
+                    images=batch_images, return_tensors="pt"
+                ).pixel_values.to(device, dtype=torch.bfloat16)
+            logits = model(pixel_values).logits.reshape(-1)[: len(batch_images)]
+            scores = logits.float().cpu().tolist()
+
+            for path, score, (lat, lng, datetime_str, date_str) in zip(
+                valid_paths, scores, batch_exif
+            ):
+                record = {
+                    "filename": os.path.basename(path),
+                    "path": path,
+                    "score": float(score),
+                    "lat": lat,
+                    "lng": lng,
+                    "timestamp": datetime_str,
+                    "date": date_str,
+                }
+                results.append(record)
+                if checkpoint_fp:
+                    checkpoint_fp.write(orjson.dumps(record) + b"\n")
 
             progress_bar.update(len(batch_paths))
 
-            if output_file and (i // batch_size + 1) % checkpoint_interval == 0:
-                current_scores = [r["score"] for r in results if "score" in r]
-                metadata = {
-                    "stats": {
-                        "totalImages": len(results),
-                        "averageScore": sum(current_scores) / len(current_scores)
-                        if current_scores
-                        else None,
-                    }
-                }
-                save_results(output_file, results, metadata)
+            if checkpoint_fp and (batch_idx + 1) % checkpoint_interval == 0:
+                checkpoint_fp.flush()
 
     return results, skipped_images
 
 
 def main(image_dir, batch_size, output_file, checkpoint_interval, bins):
     """Main function to run the image processing pipeline."""
-    image_dir_path = Path(image_dir).expanduser()
+    image_dir_path = Path(image_dir).expanduser().resolve()
     if not image_dir_path.is_dir():
         raise NotADirectoryError(f"Image directory not found: {image_dir_path}")
 
     output_file_path = Path(output_file).expanduser()
     existing_results = load_existing_results(output_file_path)
 
-    all_files = list(image_dir_path.rglob("*.*", recursive=True))
-    image_paths = [
-        f for f in all_files if not f.name.startswith("._") and f.name != ".DS_Store"
-    ]
+    image_paths = list(iter_images(str(image_dir_path)))
 
     if not image_paths:
         print(f"No valid images found in {image_dir_path}")
@@ -256,12 +561,16 @@ def main(image_dir, batch_size, output_file, checkpoint_interval, bins):
 
     device = get_device()
     print(f"Using device: {device}")
+    torch.set_grad_enabled(False)
 
     model, preprocessor = convert_v2_5_from_siglip(
         low_cpu_mem_usage=True, trust_remote_code=True
     )
     model = model.to(torch.bfloat16).to(device)
     model.eval()
+    if device.type == "cuda":
+        model = model.to(memory_format=torch.channels_last)
+        model = torch.compile(model, mode="reduce-overhead")
     print("Model loaded.")
 
     results, skipped_files = process_images_in_batches(
@@ -319,30 +628,39 @@ def main(image_dir, batch_size, output_file, checkpoint_interval, bins):
     except (ValueError, EOFError, KeyboardInterrupt):
         print("Skipping deletion.")
 
-    # Final save
-    final_scores = [r["score"] for r in results if "score" in r]
-    images_with_location = [r for r in results if r.get("lat") and r.get("lng")]
-    images_with_dates = [r for r in results if r.get("date")]
-    date_range = (
-        {
-            "min": min(r["date"] for r in images_with_dates),
-            "max": max(r["date"] for r in images_with_dates),
-        }
-        if images_with_dates
-        else None
-    )
+    # Final save: aggregate everything in one pass over the kept results
+    score_sum, score_count = 0.0, 0
+    min_score = max_score = None
+    with_location, with_dates = 0, 0
+    min_date = max_date = None
+    for r in results:
+        if "score" in r:
+            score = r["score"]
+            score_sum += score
+            score_count += 1
+            min_score = score if min_score is None else min(min_score, score)
+            max_score = score if max_score is None else max(max_score, score)
+        if r.get("lat") and r.get("lng"):
+            with_location += 1
+        if date := r.get("date"):
+            with_dates += 1
+            min_date = date if min_date is None else min(min_date, date)
+            max_date = date if max_date is None else max(max_date, date)
+
+    date_range = {"min": min_date, "max": max_date} if with_dates else None
 
     stats = {
         "totalImages": len(results),
-        "imagesWithLocation": len(images_with_location),
-        "imagesWithDates": len(images_with_dates),
-        "averageScore": sum(final_scores) / len(final_scores) if final_scores else None,
-        "minScore": min(final_scores) if final_scores else None,
-        "maxScore": max(final_scores) if final_scores else None,
+        "imagesWithLocation": with_location,
+        "imagesWithDates": with_dates,
+        "averageScore": score_sum / score_count if score_count else None,
+        "minScore": min_score,
+        "maxScore": max_score,
     }
 
     metadata = {"dateRange": date_range, "stats": stats}
     save_results(output_file_path, results, metadata)
+    get_checkpoint_file(output_file_path).unlink(missing_ok=True)
 
     print(f"\n✓ Processed {len(results)} images. Results saved to {output_file_path}")
 
@@ -370,7 +688,7 @@ if __name__ == "__main__":
         "--checkpoint-interval",
         type=int,
         default=1,
-        help="Save checkpoint every N batches.",
+        help="Flush checkpoint records to disk every N batches.",
     )
     parser.add_argument(
         "--bins", type=int, default=10, help="Number of score bins for histogram."
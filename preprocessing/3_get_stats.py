@@ -1,21 +1,23 @@
 from __future__ import annotations
 import argparse
 import json
+import math
 import subprocess
 import sys
 from collections import Counter
 from datetime import date
 from pathlib import Path
-from statistics import mean, median, stdev
-from typing import Any, Dict, Iterable, List, Optional
+from statistics import mean, median
+from typing import Any, Dict, List, Optional
+
+import orjson
 
 
 def load_images(path: Path) -> List[Dict[str, Any]]:
     """Loads an image list from a JSON file."""
     if not path.is_file():
         raise FileNotFoundError(f"Image JSON file not found: {path}")
-    with open(path, "r") as f:
-        data = json.load(f)
+    data = orjson.loads(path.read_bytes())
 
     if isinstance(data, dict):
         return data.get("images", [])
@@ -44,11 +46,49 @@ def safe_float(x: Any) -> Optional[float]:
         return None
 
 
-def summarize_scores(scores: Iterable[float]) -> Dict[str, Optional[float]]:
-    """Calculates summary statistics for a list of scores."""
-    s = [x for x in scores if x is not None]
-    if not s:
-        return {
+def compute_stats(images: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Computes a dictionary of statistics from a list of image data in a single pass."""
+    per_day: Counter = Counter()
+    scores: List[float] = []
+    score_mean = score_m2 = 0.0
+    score_min, score_max = math.inf, -math.inf
+    lat_count = lon_count = 0
+    lat_min = lon_min = math.inf
+    lat_max = lon_max = -math.inf
+
+    for item in images:
+        if d := parse_date_from_item(item):
+            per_day[d] += 1
+
+        if (score := safe_float(item.get("score"))) is not None:
+            # Welford's update keeps the running mean and variance numerically stable
+            scores.append(score)
+            delta = score - score_mean
+            score_mean += delta / len(scores)
+            score_m2 += delta * (score - score_mean)
+            score_min = min(score_min, score)
+            score_max = max(score_max, score)
+
+        if (lat := safe_float(item.get("lat"))) is not None:
+            lat_count += 1
+            lat_min = min(lat_min, lat)
+            lat_max = max(lat_max, lat)
+        if (lon := safe_float(item.get("lng"))) is not None:
+            lon_count += 1
+            lon_min = min(lon_min, lon)
+            lon_max = max(lon_max, lon)
+
+    if scores:
+        score_summary = {
+            "count": len(scores),
+            "mean": score_mean,
+            "median": median(scores),
+            "min": score_min,
+            "max": score_max,
+            "std": math.sqrt(score_m2 / (len(scores) - 1)) if len(scores) > 1 else 0.0,
+        }
+    else:
+        score_summary = {
             "count": 0,
             "mean": None,
             "median": None,
@@ -56,22 +96,6 @@ def summarize_scores(scores: Iterable[float]) -> Dict[str, Optional[float]]:
             "max": None,
             "std": None,
         }
-    return {
-        "count": len(s),
-        "mean": mean(s),
-        "median": median(s),
-        "min": min(s),
-        "max": max(s),
-        "std": stdev(s) if len(s) > 1 else 0.0,
-    }
-
-
-def compute_stats(images: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Computes a dictionary of statistics from a list of image data."""
-    per_day = Counter(d for i in images if (d := parse_date_from_item(i)))
-    scores = [safe_float(i.get("score")) for i in images]
-    lat_vals = [lat for i in images if (lat := safe_float(i.get("lat"))) is not None]
-    lon_vals = [lon for i in images if (lon := safe_float(i.get("lng"))) is not None]
 
     unique_days = sorted(per_day.keys())
     earliest, latest = (
@@ -87,13 +111,13 @@ def compute_stats(images: List[Dict[str, Any]]) -> Dict[str, Any]:
         "span_days": span_days,
         "images_per_active_day_mean": mean(per_day.values()) if per_day else 0,
         "busiest_day_count": max(per_day.values()) if per_day else 0,
-        "score_summary": summarize_scores(scores),
+        "score_summary": score_summary,
         "geo_summary": {
-            "with_coords": len(lat_vals),
-            "lat_min": min(lat_vals) if lat_vals else None,
-            "lat_max": max(lat_vals) if lat_vals else None,
-            "lon_min": min(lon_vals) if lon_vals else None,
-            "lon_max": max(lon_vals) if lon_vals else None,
+            "with_coords": lat_count,
+            "lat_min": lat_min if lat_count else None,
+            "lat_max": lat_max if lat_count else None,
+            "lon_min": lon_min if lon_count else None,
+            "lon_max": lon_max if lon_count else None,
         },
         "per_day_counts": {d.isoformat(): c for d, c in per_day.items()},
     }
@@ -1,59 +1,98 @@
 import argparse
+import io
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+import orjson
 from PIL import Image
 from tqdm import tqdm
 
+# Pillow's integer reduce() handles the bulk of large downscales and LANCZOS
+# only runs on the last REDUCING_GAP factor; at 3.0 the output is visually
+# indistinguishable from a full LANCZOS pass.
+RESAMPLE = Image.Resampling.LANCZOS
+REDUCING_GAP = 3.0
+THUMBNAIL_OVERSAMPLE = 3
 
-def generate_thumbnail(source_path: Path, output_path: Path, size: int) -> bool:
-    """Generates a square, centered WebP thumbnail for an image."""
+
+def generate_thumbnail(img: Image.Image, output_path: Path, size: int) -> bool:
+    """Generates a square, centered WebP thumbnail from a decoded RGB image."""
     try:
-        with Image.open(source_path) as img:
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-
-            img.thumbnail((size, size), Image.Resampling.LANCZOS)
-
-            width, height = img.size
-            if width != height:
-                crop_size = min(width, height)
-                left, top = (width - crop_size) // 2, (height - crop_size) // 2
-                img = img.crop((left, top, left + crop_size, top + crop_size))
-                img = img.resize((size, size), Image.Resampling.LANCZOS)
-
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            img.save(output_path, "WEBP", quality=75, method=6)
-            return True
+        width, height = img.size
+        if width != height:
+            crop_size = min(width, height)
+            left, top = (width - crop_size) // 2, (height - crop_size) // 2
+            img = img.crop((left, top, left + crop_size, top + crop_size))
+
+        # Supersample with NEAREST down to a few times the target so the
+        # LANCZOS pass only filters a small image.
+        oversample = size * THUMBNAIL_OVERSAMPLE
+        if img.width > oversample:
+            img = img.resize((oversample, oversample), Image.Resampling.NEAREST)
+        img = img.resize((size, size), RESAMPLE)
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        img.save(output_path, "WEBP", quality=75, method=6)
+        return True
     except Exception as e:
-        print(f"Error generating thumbnail for {source_path.name}: {e}")
+        print(f"Error generating thumbnail {output_path.name}: {e}")
         return False
 
 
 def resize_and_convert_image(
-    source_path: Path, output_path: Path, max_dims: tuple[int, int], quality: int
+    img: Image.Image,
+    output_path: Path,
+    max_dims: tuple[int, int],
+    quality: int,
+    method: int = 4,
 ) -> bool:
-    """Resizes an image to fit within max_dims and converts it to WebP."""
+    """Resizes a decoded RGB image to fit within max_dims and saves it as WebP.
+
+    `method` is libwebp's encoder effort (0-6); on full-size exports 4 encodes
+    two to three times faster than 6 for files only a few percent larger.
+    """
     try:
-        with Image.open(source_path) as img:
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-
-            img.thumbnail(max_dims, Image.Resampling.LANCZOS)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # Strip metadata by creating a new image
-            data = list(img.getdata())
-            new_img = Image.new(img.mode, img.size)
-            new_img.putdata(data)
-            new_img.save(output_path, format="WEBP", quality=quality, method=6)
-            return True
+        img.thumbnail(max_dims, RESAMPLE, reducing_gap=REDUCING_GAP)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Strip metadata at encode time rather than copying the pixels
+        img.save(
+            output_path,
+            format="WEBP",
+            lossless=False,
+            quality=quality,
+            method=method,
+            exif=b"",
+            icc_profile=None,
+            xmp=b"",
+        )
+        return True
     except Exception as e:
-        print(f"Error processing {source_path.name}: {e}")
+        print(f"Error processing {output_path.name}: {e}")
         return False
 
 
+def load_rgb_image(
+    source_path: Path, max_dims: tuple[int, int]
+) -> Optional[Image.Image]:
+    """Decodes a source image once into an in-memory RGB image.
+
+    JPEGs are decoded at the largest DCT reduction (1/2, 1/4 or 1/8) that
+    still covers max_dims, so oversized camera files skip the full-size decode.
+    """
+    try:
+        # Read the whole file in one call instead of many small decoder reads
+        with Image.open(io.BytesIO(source_path.read_bytes())) as src:
+            src.draft("RGB", max_dims)
+            src.load()
+            return src.convert("RGB") if src.mode != "RGB" else src.copy()
+    except Exception as e:
+        print(f"Error reading {source_path.name}: {e}")
+        return None
+
+
 def process_image(
     img_data: Dict[str, Any],
     json_path: Path,
@@ -62,6 +101,7 @@ def process_image(
     max_dims: tuple[int, int],
     quality: int,
     thumb_size: int,
+    webp_method: int = 4,
 ) -> Optional[Dict[str, Any]]:
     """Processes a single image: resizes, converts, and generates a thumbnail."""
     source_path_str = img_data.get("path")
@@ -81,9 +121,16 @@ def process_image(
     output_path = output_dir / webp_filename
     thumbnail_path = thumbnails_dir / webp_filename
 
-    if not resize_and_convert_image(source_path, output_path, max_dims, quality):
+    img = load_rgb_image(source_path, max_dims)
+    if img is None:
         return None
-    if not generate_thumbnail(source_path, thumbnail_path, thumb_size):
+
+    # The thumbnail leaves img untouched, so the export can resize it in place.
+    if not generate_thumbnail(img, thumbnail_path, thumb_size):
+        return None
+    if not resize_and_convert_image(
+        img, output_path, max_dims, quality, method=webp_method
+    ):
         return None
 
     new_data = img_data.copy()
@@ -92,6 +139,28 @@ def process_image(
     return new_data
 
 
+_WORKER_CONFIG: Dict[str, Any] = {}
+
+
+def _init_worker(
+    json_path, output_dir, thumbnails_dir, max_dims, quality, thumb_size, webp_method
+):
+    """Stores the shared export settings once per worker process."""
+    _WORKER_CONFIG.update(
+        json_path=json_path,
+        output_dir=output_dir,
+        thumbnails_dir=thumbnails_dir,
+        max_dims=max_dims,
+        quality=quality,
+        thumb_size=thumb_size,
+        webp_method=webp_method,
+    )
+
+
+def _process_image_worker(img_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return process_image(img_data, **_WORKER_CONFIG)
+
+
 def export_web_images(
     json_path: Path,
     output_dir: Path,
@@ -100,14 +169,14 @@ def export_web_images(
     quality: int,
     thumb_size: int,
     dry_run: bool,
+    webp_method: int = 4,
 ):
     """Exports and optimizes images for web use based on specified criteria."""
     if not json_path.is_file():
         print(f"Error: JSON file not found: {json_path}")
         return 1
 
-    with open(json_path, "r") as f:
-        data = json.load(f)
+    data = orjson.loads(json_path.read_bytes())
 
     images = data.get("images", [])
     if not images:
@@ -133,40 +202,66 @@ def export_web_images(
     output_dir.mkdir(parents=True, exist_ok=True)
     thumbnails_dir.mkdir(parents=True, exist_ok=True)
 
-    exported_images = []
-    for img_data in tqdm(filtered_images, desc="Processing images", unit="image"):
-        result = process_image(
-            img_data,
-            json_path,
-            output_dir,
-            thumbnails_dir,
-            max_dims,
-            quality,
-            thumb_size,
-        )
-        if result:
-            exported_images.append(result)
-
-    if not exported_images:
+    # Each record is streamed out as soon as its worker finishes. The new
+    # manifest only replaces the source JSON once it is complete, since both
+    # normally live at the same path.
+    exported_json_path = output_dir / "image_data.json"
+    tmp_path = exported_json_path.with_name(exported_json_path.name + ".tmp")
+    exported_count = 0
+    score_count, score_sum = 0, 0.0
+    score_min_seen = score_max_seen = None
+    with (
+        open(tmp_path, "wb") as out,
+        ProcessPoolExecutor(
+            initializer=_init_worker,
+            initargs=(
+                json_path,
+                output_dir,
+                thumbnails_dir,
+                max_dims,
+                quality,
+                thumb_size,
+                webp_method,
+            ),
+        ) as pool,
+    ):
+        out.write(b'{"images": [')
+        results = pool.map(_process_image_worker, filtered_images, chunksize=8)
+        for result in tqdm(
+            results, total=len(filtered_images), desc="Processing images", unit="image"
+        ):
+            if not result:
+                continue
+            out.write(b",\n" if exported_count else b"\n")
+            out.write(orjson.dumps(result))
+            exported_count += 1
+
+            # Accumulate score stats for the exported subset as records arrive
+            score = result.get("score")
+            if score is not None:
+                score_count += 1
+                score_sum += score
+                if score_min_seen is None or score < score_min_seen:
+                    score_min_seen = score
+                if score_max_seen is None or score > score_max_seen:
+                    score_max_seen = score
+
+        stats = {
+            "totalImages": exported_count,
+            "averageScore": score_sum / score_count if score_count else None,
+            "minScore": score_min_seen,
+            "maxScore": score_max_seen,
+        }
+        out.write(b'\n], "metadata": ' + orjson.dumps({"stats": stats}) + b"}\n")
+
+    if not exported_count:
+        tmp_path.unlink()
         print("No images were successfully processed.")
         return 1
-
-    # Recalculate metadata and save new JSON
-    final_scores = [img["score"] for img in exported_images if "score" in img]
-    stats = {
-        "totalImages": len(exported_images),
-        "averageScore": sum(final_scores) / len(final_scores) if final_scores else None,
-        "minScore": min(final_scores) if final_scores else None,
-        "maxScore": max(final_scores) if final_scores else None,
-    }
-    exported_data = {"images": exported_images, "metadata": {"stats": stats}}
-
-    exported_json_path = output_dir / "image_data.json"
-    with open(exported_json_path, "w") as f:
-        json.dump(exported_data, f, indent=2)
+    tmp_path.replace(exported_json_path)
 
     print(
-        f"\n✓ Successfully exported {len(exported_images)} images and created {exported_json_path}"
+        f"\n✓ Successfully exported {exported_count} images and created {exported_json_path}"
     )
     return 0
 
@@ -201,6 +296,13 @@ def main():
     parser.add_argument(
         "--thumbnail-size", type=int, default=96, help="Thumbnail size in pixels."
     )
+    parser.add_argument(
+        "--webp-method",
+        type=int,
+        default=4,
+        choices=range(7),
+        help="WebP encoder effort for exported images (0-6; thumbnails use 6).",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -223,6 +325,7 @@ def main():
         quality=args.quality,
         thumb_size=args.thumbnail_size,
         dry_run=args.dry_run,
+        webp_method=args.webp_method,
     )
 
 
@@ -1,80 +1,46 @@
 import argparse
-from collections import defaultdict
 from pathlib import Path
 import importlib.util
 
-import imagehash
-from PIL import Image, ImageEnhance
-from tqdm import tqdm
-
-EXTENSIONS = {
-    ".jpg",
-    ".jpeg",
-    ".png",
-    ".webp",
-    ".heic",
-    ".JPG",
-    ".JPEG",
-    ".PNG",
-    ".WEBP",
-    ".HEIC",
-}
-
-
-def compute_dhash(path: Path, hash_size: int, preprocess: bool):
-    """Computes the difference hash (dhash) for an image."""
-    try:
-        with Image.open(path) as img:
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            if preprocess:
-                img = ImageEnhance.Contrast(img).enhance(1.15)
-                img = ImageEnhance.Brightness(img).enhance(1.05)
-            return imagehash.dhash(img, hash_size=hash_size)
-    except Exception:
-        return None
-
-
-def find_connected_components(pairs):
-    """Finds clusters of connected items from a list of pairs."""
-    graph = defaultdict(set)
-    for a, b in pairs:
-        graph[a].add(b)
-        graph[b].add(a)
-
-    visited = set()
-    clusters = []
-    for node in graph:
-        if node not in visited:
-            comp = set()
-            q = [node]
-            visited.add(node)
-            head = 0
-            while head < len(q):
-                curr = q[head]
-                head += 1
-                comp.add(curr)
-                for neighbor in graph.get(curr, []):
-                    if neighbor not in visited:
-                        visited.add(neighbor)
-                        q.append(neighbor)
-            if len(comp) > 1:
-                clusters.append(sorted(list(comp)))
-    return clusters
+import numpy as np
+
+from remove_duplicates import (
+    batched_dhash,
+    delete_files,
+    find_connected_components,
+    hamming_distances,
+    list_images,
+    load_hash_inputs,
+)
 
 
 def evaluate_thresholds(hashes, thresholds):
-    """Evaluates clustering for a range of hash distance thresholds."""
+    """Evaluates clustering for a range of hash distance thresholds.
+
+    `hashes` maps each file to its dhash input grid from `load_hash_inputs`.
+    """
+    if not thresholds:
+        return {}
     files_list = list(hashes.keys())
-    distances = [
-        (i, j, hashes[files_list[i]] - hashes[files_list[j]])
-        for i in range(len(files_list))
-        for j in range(i + 1, len(files_list))
-    ]
+    grids = np.stack(list(hashes.values()))
+    packed = batched_dhash(grids)
+    hash_bits = grids.shape[1] * (grids.shape[2] - 1)
+
+    # Sort every pair within reach of the largest threshold by distance, so
+    # each threshold's pairs are just a prefix of the same arrays.
+    first, second, dist = hamming_distances(
+        packed, max(thresholds), hash_bits=hash_bits
+    )
+    order = np.argsort(dist, kind="stable")
+    first, second, dist = first[order], second[order], dist[order]
 
     results = {}
     for thr in thresholds:
-        pairs = [(files_list[i], files_list[j]) for i, j, d in distances if d <= thr]
+        end = int(np.searchsorted(dist, thr, side="right"))
+        pairs = [
+            (files_list[i], files_list[j])
+            for i, j in zip(first[:end].tolist(), second[:end].tolist())
+        ]
         clusters = find_connected_components(pairs)
         to_delete = sum(len(c) - 1 for c in clusters)
         results[thr] = {"clusters": clusters, "to_delete": to_delete}
@@ -111,24 +77,13 @@ def main():
         print(f"Directory not found: {image_dir}")
         return 1
 
-    files = sorted(
-        [
-            f
-            for ext in EXTENSIONS
-            for f in image_dir.glob(f"*{ext}")
-            if not f.name.startswith("._")
-        ]
-    )
+    files = list_images(image_dir)
     if len(files) < 2:
         print("At least 2 images are required for comparison.")
         return 0
 
-    print(f"Found {len(files)} images. Computing dhash (preprocess enabled)...")
-    hashes = {
-        f: h
-        for f in tqdm(files, desc="Hashing")
-        if (h := compute_dhash(f, args.hash_size, True))
-    }
+    print(f"Found {len(files)} images. Computing dhash...")
+    hashes = load_hash_inputs(files, hash_size=args.hash_size)
 
     if not hashes:
         print("Could not hash any images.")
@@ -192,9 +147,7 @@ def main():
         )
     else:
         # Fallback to simple deletion
-        deleted_count = sum(
-            1 for p in tqdm(to_delete, desc="Deleting") if p.unlink(missing_ok=True)
-        )
+        deleted_count, _ = delete_files(to_delete)
         print(f"\nDeleted {deleted_count} file(s).")
 
     return 0
@@ -1,15 +1,16 @@
 from __future__ import annotations
-import json
+import os
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
+
 
 def load_image_json(json_path: Path) -> Tuple[Any, List[Dict[str, Any]]]:
     """Loads image data from a JSON file, returning the original structure and the image list."""
     if not json_path.is_file():
         raise FileNotFoundError(f"Image JSON not found: {json_path}")
-    with open(json_path, "r") as f:
-        data = json.load(f)
+    data = orjson.loads(json_path.read_bytes())
 
     if isinstance(data, dict):
         images = data.get("images", [])
@@ -30,8 +31,7 @@ def save_image_json(json_path: Path, original_data: Any, images: List[Dict[str,
     else:
         data = images
 
-    with open(out_path, "w") as f:
-        json.dump(data, f, indent=2, default=str)
+    out_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2, default=str))
 
 
 def remove_paths_from_image_json(
@@ -44,19 +44,20 @@ def remove_paths_from_image_json(
     original_data, images = load_image_json(json_path)
 
     base_dir = Path(base_dir) if base_dir else json_path.parent
-    target_paths = {p.resolve() for p in targets}
+    # Resolve the base and targets once; entries are then normalized as plain
+    # strings instead of paying realpath syscalls per key per item.
+    base_str = str(base_dir.resolve())
+    target_paths = {str(p.resolve()) for p in targets}
+
+    def absolute(path_str: str) -> str:
+        return os.path.normpath(os.path.join(base_str, path_str))
 
     def should_remove(item: Dict[str, Any]) -> bool:
-        for key in ("path", "thumbnail", "filename"):
-            path_str = item.get(key)
-            if path_str:
-                p = Path(path_str)
-                resolved_path = (
-                    (base_dir / p).resolve() if not p.is_absolute() else p.resolve()
-                )
-                if resolved_path in target_paths:
-                    return True
-        return False
+        return any(
+            absolute(path_str) in target_paths
+            for key in ("path", "thumbnail", "filename")
+            if (path_str := item.get(key))
+        )
 
     kept_images = []
     removed_count, deleted_count, missing_count = 0, 0, 0
@@ -68,16 +69,17 @@ def remove_paths_from_image_json(
                 for key in ("path", "thumbnail"):
                     path_str = item.get(key)
                     if path_str:
-                        p = Path(path_str)
-                        resolved_path = (
-                            (base_dir / p).resolve()
-                            if not p.is_absolute()
-                            else p.resolve()
-                        )
-                        if resolved_path.is_file():
-                            resolved_path.unlink()
+                        target = absolute(path_str)
+                        try:
+                            os.unlink(target)
                             deleted_count += 1
-                        else:
+                        except FileNotFoundError:
+                            missing_count += 1
+                        except (IsADirectoryError, PermissionError):
+                            # macOS raises PermissionError when unlinking a
+                            # directory; only that case counts as not a file.
+                            if not os.path.isdir(target):
+                                raise
                             missing_count += 1
         else:
             kept_images.append(item)
@@ -0,0 +1,294 @@
+import argparse
+import importlib.util
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import orjson
+from tqdm import tqdm
+
+from remove_duplicates import (
+    batched_dhash,
+    delete_files,
+    find_connected_components,
+    hamming_pairs,
+    hash_grid,
+    select_representative,
+)
+
+
+def _load_script(filename: str):
+    """Imports a sibling script whose name is not a valid module name."""
+    path = Path(__file__).resolve().parent / filename
+    spec = importlib.util.spec_from_file_location(path.stem, str(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+web_export = _load_script("4_export_images_for_web.py")
+
+_WORKER_CONFIG: Dict[str, Any] = {}
+
+
+def _init_worker(
+    json_path, output_dir, thumbnails_dir, max_dims, quality, thumb_size, hash_size
+):
+    """Stores the shared pipeline settings once per worker process."""
+    _WORKER_CONFIG.update(
+        json_path=json_path,
+        output_dir=output_dir,
+        thumbnails_dir=thumbnails_dir,
+        max_dims=max_dims,
+        quality=quality,
+        thumb_size=thumb_size,
+        hash_size=hash_size,
+    )
+
+
+def resolve_source(img_data: Dict[str, Any], json_path: Path) -> Optional[Path]:
+    """Returns a record's source image path, resolving it against the JSON."""
+    source_path_str = img_data.get("path")
+    if not source_path_str:
+        return None
+    source_path = Path(source_path_str)
+    if not source_path.is_absolute():
+        source_path = (json_path.parent / source_path).resolve()
+    return source_path
+
+
+def reserve_export_names(
+    images: List[Dict[str, Any]], sources: List[Optional[Path]], output_dir: Path
+) -> List[tuple[Dict[str, Any], Path, str]]:
+    """Assigns every record with a source a unique WebP file name up front.
+
+    Records sharing a stem (IMG_0001.jpg and IMG_0001.heic, or one name in two
+    folders) get "<stem> (n).webp" like export_photos, so no two workers write
+    the same file and deleting a duplicate's export never touches a kept one.
+    Names of source files already in output_dir are taken as well, so exports
+    never overwrite a record that has not been decoded yet. Names are compared
+    case-insensitively for macOS file systems.
+    """
+    output_dir = output_dir.resolve()
+    taken = {
+        source.name.lower()
+        for source in sources
+        if source is not None and source.parent == output_dir
+    }
+    jobs = []
+    for img_data, source_path in zip(images, sources):
+        if source_path is None:
+            continue
+        stem = Path(img_data.get("filename", source_path.name)).stem
+        webp_filename, n = f"{stem}.webp", 0
+        while webp_filename.lower() in taken:
+            n += 1
+            webp_filename = f"{stem} ({n}).webp"
+        taken.add(webp_filename.lower())
+        jobs.append((img_data, source_path, webp_filename))
+    return jobs
+
+
+def process_record(
+    job: tuple[Dict[str, Any], Path, str],
+) -> Optional[tuple[Path, np.ndarray, Dict[str, Any], Path, Path]]:
+    """Decodes a record's source once and derives its dhash grid, thumbnail and export.
+
+    Takes a (record, source_path, webp_filename) job from reserve_export_names.
+    Returns (source_path, hash_grid, exported_record, export_path,
+    thumbnail_path), where exported_record keeps every field of the input
+    record with path and thumbnail pointing at the new files, or None if any
+    step fails.
+    """
+    cfg = _WORKER_CONFIG
+    img_data, source_path, webp_filename = job
+    if not source_path.is_file():
+        return None
+
+    img = web_export.load_rgb_image(source_path, cfg["max_dims"])
+    if img is None:
+        return None
+
+    pixels = hash_grid(img, hash_size=cfg["hash_size"])
+    output_path = cfg["output_dir"] / webp_filename
+    thumbnail_path = cfg["thumbnails_dir"] / webp_filename
+
+    # Neither the hash nor the thumbnail modifies img, so the export goes last
+    # and resizes it in place.
+    if not web_export.generate_thumbnail(img, thumbnail_path, cfg["thumb_size"]):
+        return None
+    if not web_export.resize_and_convert_image(
+        img, output_path, cfg["max_dims"], cfg["quality"]
+    ):
+        return None
+
+    new_data = img_data.copy()
+    new_data["path"] = str(output_path.relative_to(cfg["output_dir"].parent))
+    new_data["thumbnail"] = str(thumbnail_path.relative_to(cfg["output_dir"].parent))
+    return source_path, pixels, new_data, output_path, thumbnail_path
+
+
+def run_pipeline(
+    json_path: Path,
+    output_dir: Path,
+    output_json: Path,
+    threshold: int,
+    hash_size: int,
+    max_dims: tuple[int, int],
+    quality: int,
+    thumb_size: int,
+) -> int:
+    """Exports, thumbnails and deduplicates a scored manifest in one decode per file."""
+    if not json_path.is_file():
+        print(f"Error: JSON file not found: {json_path}")
+        return 1
+    if output_json.resolve() == json_path.resolve():
+        print(f"Error: refusing to overwrite the input manifest {json_path}")
+        return 1
+
+    images = orjson.loads(json_path.read_bytes()).get("images", [])
+    if not images:
+        print("No images found in JSON.")
+        return 1
+
+    source_paths = [resolve_source(img, json_path) for img in images]
+    jobs = reserve_export_names(images, source_paths, output_dir)
+
+    thumbnails_dir = output_dir / "thumbnails"
+    thumbnails_dir.mkdir(parents=True, exist_ok=True)
+
+    processed = []
+    with ProcessPoolExecutor(
+        initializer=_init_worker,
+        initargs=(
+            json_path,
+            output_dir,
+            thumbnails_dir,
+            max_dims,
+            quality,
+            thumb_size,
+            hash_size,
+        ),
+    ) as pool:
+        results = pool.map(process_record, jobs, chunksize=8)
+        for result in tqdm(results, total=len(jobs), desc="Processing", unit="image"):
+            if result:
+                processed.append(result)
+
+    if not processed:
+        print("No images were successfully processed.")
+        return 1
+
+    sources = [source for source, _, _, _, _ in processed]
+    hashes = batched_dhash(np.stack([pixels for _, pixels, _, _, _ in processed]))
+    pairs = [
+        (sources[i], sources[j])
+        for i, j in hamming_pairs(hashes, threshold, hash_bits=hash_size**2)
+    ]
+    clusters = find_connected_components(pairs)
+
+    duplicates = {p for c in clusters for p in c if p != select_representative(c)}
+    kept = []
+    stale_outputs = []
+    for source, _, record, output_path, thumbnail_path in processed:
+        if source in duplicates:
+            stale_outputs.extend((output_path, thumbnail_path))
+        else:
+            kept.append(record)
+    if stale_outputs:
+        delete_files(stale_outputs)
+
+    scores = [img["score"] for img in kept if img.get("score") is not None]
+    stats = {
+        "totalImages": len(kept),
+        "averageScore": sum(scores) / len(scores) if scores else None,
+        "minScore": min(scores, default=None),
+        "maxScore": max(scores, default=None),
+    }
+    exported = {"images": kept, "metadata": {"stats": stats}}
+    output_json.write_bytes(orjson.dumps(exported, option=orjson.OPT_INDENT_2))
+
+    print(
+        f"\n✓ Exported {len(kept)} images ({len(duplicates)} duplicates dropped) "
+        f"and created {output_json}"
+    )
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Hash, export and thumbnail scored images, decoding each once."
+    )
+    parser.add_argument(
+        "--json-path",
+        type=str,
+        help="Scored manifest (default: <export_path>/image_data.json).",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help="Output directory for processed images (default: config export_path).",
+    )
+    parser.add_argument(
+        "--output-json",
+        type=str,
+        help="Manifest to write (default: <output-dir>/image_data_pipeline.json).",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        help="Hamming distance threshold (default: config deduplication_threshold).",
+    )
+    parser.add_argument(
+        "--hash-size",
+        type=int,
+        help="Hash size for dhash (default: config deduplication_hash_size).",
+    )
+    parser.add_argument(
+        "--max-width", type=int, default=1920, help="Maximum width for exported images."
+    )
+    parser.add_argument(
+        "--max-height",
+        type=int,
+        default=1920,
+        help="Maximum height for exported images.",
+    )
+    parser.add_argument("--quality", type=int, default=85, help="WebP quality (1-100).")
+    parser.add_argument(
+        "--thumbnail-size", type=int, default=96, help="Thumbnail size in pixels."
+    )
+    args = parser.parse_args()
+
+    # Load from config.json like steps 2 and 4, so every step reads and writes
+    # the same export directory; explicit arguments still win.
+    with open("config.json", "r") as f:
+        config = json.load(f)
+
+    output_dir = Path(
+        args.output_dir or config.get("export_path", "frontend/web_export")
+    ).expanduser()
+    json_path = Path(args.json_path or output_dir / "image_data.json").expanduser()
+    output_json = Path(
+        args.output_json or output_dir / "image_data_pipeline.json"
+    ).expanduser()
+    if args.threshold is None:
+        args.threshold = config.get("deduplication_threshold", 8)
+    if args.hash_size is None:
+        args.hash_size = config.get("deduplication_hash_size", 8)
+
+    return run_pipeline(
+        json_path=json_path,
+        output_dir=output_dir,
+        output_json=output_json,
+        threshold=args.threshold,
+        hash_size=args.hash_size,
+        max_dims=(args.max_width, args.max_height),
+        quality=args.quality,
+        thumb_size=args.thumbnail_size,
+    )
+
+
+if __name__ == "__main__":
+    exit(main())
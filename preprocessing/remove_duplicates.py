@@ -1,77 +1,265 @@
 import argparse
+import io
+import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Iterable, List, Dict, Any
+from typing import Iterable, List, Dict, Any, Optional
 
-import imagehash
-from PIL import Image, ImageEnhance
+import numpy as np
+from PIL import Image
 from tqdm import tqdm
 
 
-EXTENSIONS = {
-    ".jpg",
-    ".jpeg",
-    ".png",
-    ".webp",
-    ".heic",
-    ".JPG",
-    ".JPEG",
-    ".PNG",
-    ".WEBP",
-    ".HEIC",
-}
+EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".heic"}
 
 
-def compute_dhash(path: Path, hash_size=8, preprocess=True):
+def list_images(image_dir: Path, extensions: Iterable[str] = None) -> List[Path]:
+    """Lists image files in image_dir with a single directory scan, sorted.
+
+    Extensions match case-insensitively and AppleDouble `._` files are skipped.
+    """
+    exts = {e.lower() for e in (EXTENSIONS if extensions is None else extensions)}
+    with os.scandir(image_dir) as entries:
+        files = [
+            Path(entry.path)
+            for entry in entries
+            if not entry.name.startswith("._")
+            and os.path.splitext(entry.name)[1].lower() in exts
+            and entry.is_file()
+        ]
+    return sorted(files)
+
+
+def hash_grid(img: Image.Image, hash_size=8) -> np.ndarray:
+    """Shrinks an opened image to the small grayscale grid that dhash compares.
+
+    No contrast or brightness pass is applied: both are monotonic per-pixel
+    maps, so on the grid they cannot change a neighbour comparison.
+    """
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    img = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    return np.asarray(img)
+
+
+def load_hash_input(path: Path, hash_size=8):
+    """Decodes an image into the small grayscale grid that dhash compares.
+
+    JPEGs are decoded at 1/8 scale, so their grids differ slightly from a
+    full decode and a hash can move by a few bits (0-6 of 64 measured)
+    compared with imagehash.dhash on the full image. No draft size short of
+    the full decode keeps the LANCZOS grid bit-stable.
+    """
     try:
-        with Image.open(path) as img:
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            if preprocess:
-                img = ImageEnhance.Contrast(img).enhance(1.15)
-                img = ImageEnhance.Brightness(img).enhance(1.05)
-            return imagehash.dhash(img, hash_size=hash_size)
+        # Read the whole file in one call instead of many small decoder reads
+        with Image.open(io.BytesIO(path.read_bytes())) as img:
+            # JPEGs decode only their luma plane at 1/8 scale, like OpenCV's
+            # IMREAD_REDUCED_GRAYSCALE_8; other formats ignore the draft.
+            img.draft("L", (hash_size + 1, hash_size))
+            return hash_grid(img, hash_size=hash_size)
     except Exception:
         return None
 
 
-def find_connected_components(pairs: Iterable[tuple[Path, Path]]) -> List[List[Path]]:
-    graph: Dict[Path, set] = defaultdict(set)
-    for a, b in pairs:
-        graph[a].add(b)
-        graph[b].add(a)
+def load_hash_inputs(files: List[Path], hash_size=8) -> Dict[Path, np.ndarray]:
+    """Decodes hash inputs for many files in parallel, skipping unreadable ones."""
+    load = partial(load_hash_input, hash_size=hash_size)
+    hash_inputs: Dict[Path, np.ndarray] = {}
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(load, files, chunksize=16)
+        for f, pixels in tqdm(zip(files, results), total=len(files), desc="hashing"):
+            if pixels is not None:
+                hash_inputs[f] = pixels
+    return hash_inputs
+
+
+def pack_hash_bits(bits: np.ndarray) -> np.ndarray:
+    """Packs a stack of boolean hash grids into zero-padded (N, W) uint64 words."""
+    packed = np.packbits(bits.reshape(len(bits), -1), axis=1)
+    packed = np.pad(packed, ((0, 0), (0, -packed.shape[1] % 8)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def batched_dhash(pixels: np.ndarray) -> np.ndarray:
+    """Computes dhash bits for a stack of (N, hash_size, hash_size + 1) grids.
+
+    The bit layout matches `imagehash.dhash`: each pixel is compared with its
+    left neighbour, row by row. Each row of the result packs one hash into
+    zero-padded uint64 words.
+    """
+    return pack_hash_bits(pixels[:, :, 1:] > pixels[:, :, :-1])
+
+
+def popcount(x: np.ndarray) -> np.ndarray:
+    """Counts set bits per uint64 element (hardware POPCNT on NumPy >= 2.0)."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    return np.unpackbits(x[..., None].view(np.uint8), axis=-1).sum(axis=-1)
+
+
+def bucket_candidates(
+    hashes: np.ndarray, threshold: int, hash_bits: Optional[int] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns candidate pairs (i, j), i < j, that share at least one hash chunk.
+
+    By pigeonhole, two hashes within `threshold` bits agree exactly on at
+    least one of `threshold + 1` disjoint bit chunks, so pairs that share no
+    chunk can be skipped without computing their distance. Only the first
+    `hash_bits` bits are chunked; the zero padding after them is the same for
+    every hash and would put everything in one bucket.
+    """
+    n = len(hashes)
+    if hash_bits is None:
+        hash_bits = hashes.shape[1] * 64
+    bits = np.unpackbits(hashes.view(np.uint8), axis=1)[:, :hash_bits]
+    bounds = np.linspace(0, bits.shape[1], threshold + 2).astype(int)
+    found = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        chunk = np.ascontiguousarray(np.packbits(bits[:, start:stop], axis=1))
+        keys = chunk.view(np.dtype((np.void, chunk.shape[1]))).ravel()
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        # Equal chunks are contiguous once sorted, so pair each entry with
+        # the next `offset` entries until no bucket is that large.
+        for offset in range(1, n):
+            same = np.nonzero(keys[offset:] == keys[:-offset])[0]
+            if not len(same):
+                break
+            found.append(np.stack([order[same], order[same + offset]], axis=1))
+    if not found:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    pairs = np.sort(np.concatenate(found), axis=1).astype(np.int64)
+    flat = np.unique(pairs[:, 0] * n + pairs[:, 1])
+    return flat // n, flat % n
+
+
+def hamming_distances(
+    hashes: np.ndarray,
+    threshold: int,
+    block_size: int = 1024,
+    hash_bits: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns (i, j, distance) arrays for pairs i < j within `threshold` bits.
+
+    When each of the `threshold + 1` pigeonhole chunks is wide enough that
+    buckets average at most one hash, only bucket-mates are compared.
+    Otherwise distances are computed in block_size x block_size tiles so each
+    XOR and popcount pass stays cache sized instead of materializing an N x N
+    matrix. `hash_bits` is the number of real bits per hash (hash_size ** 2)
+    and defaults to every packed bit.
+    """
+    n = len(hashes)
+    if hash_bits is None:
+        hash_bits = hashes.shape[1] * 64
+    if n > 1 and 2 ** (hash_bits // (threshold + 1)) >= n:
+        i, j = bucket_candidates(hashes, threshold, hash_bits)
+        dist = popcount(hashes[i] ^ hashes[j]).sum(axis=-1)
+        keep = dist <= threshold
+        return (
+            i[keep].astype(np.int32),
+            j[keep].astype(np.int32),
+            dist[keep].astype(np.uint16),
+        )
+
+    found_i, found_j, found_d = [], [], []
+    for r0 in range(0, n, block_size):
+        rows = hashes[r0 : r0 + block_size]
+        for c0 in range(r0, n, block_size):
+            cols = hashes[c0 : c0 + block_size]
+            dist = popcount(rows[:, None, :] ^ cols[None, :, :]).sum(axis=-1)
+            i, j = np.nonzero(dist <= threshold)
+            keep = j + c0 > i + r0
+            i, j = i[keep], j[keep]
+            found_i.append((i + r0).astype(np.int32))
+            found_j.append((j + c0).astype(np.int32))
+            found_d.append(dist[i, j].astype(np.uint16))
+    if not found_i:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty, np.empty(0, dtype=np.uint16)
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+
+
+def hamming_pairs(
+    hashes: np.ndarray,
+    threshold: int,
+    block_size: int = 1024,
+    hash_bits: Optional[int] = None,
+) -> List[tuple[int, int]]:
+    """Returns index pairs (i, j), i < j, whose hashes differ in at most `threshold` bits."""
+    i, j, _ = hamming_distances(hashes, threshold, block_size, hash_bits)
+    return list(zip(i.tolist(), j.tolist()))
 
-    visited = set()
-    clusters: List[List[Path]] = []
 
-    def dfs(node, comp):
-        if node in visited:
-            return
-        visited.add(node)
-        comp.add(node)
-        for nb in graph.get(node, []):
-            if nb not in visited:
-                dfs(nb, comp)
+def find_connected_components(pairs: Iterable[tuple[Path, Path]]) -> List[List[Path]]:
+    """Groups items linked by pairs into sorted clusters using union-find."""
+    index: Dict[Path, int] = {}
+    items: List[Path] = []
+    parent: List[int] = []
+    size: List[int] = []
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]  # path halving
+            i = parent[i]
+        return i
+
+    def node(item: Path) -> int:
+        i = index.get(item)
+        if i is None:
+            i = index[item] = len(items)
+            items.append(item)
+            parent.append(i)
+            size.append(1)
+        return i
 
-    for node in graph:
-        if node not in visited:
-            comp = set()
-            dfs(node, comp)
-            if len(comp) > 1:
-                clusters.append(sorted(comp))
+    for a, b in pairs:
+        ra, rb = find(node(a)), find(node(b))
+        if ra == rb:
+            continue
+        if size[ra] < size[rb]:
+            ra, rb = rb, ra
+        parent[rb] = ra
+        size[ra] += size[rb]
 
-    return clusters
+    groups: Dict[int, List[Path]] = defaultdict(list)
+    for i, item in enumerate(items):
+        groups[find(i)].append(item)
+    return [sorted(g) for g in groups.values() if len(g) > 1]
 
 
 def select_representative(cluster: List[Path]) -> Path:
     return min(cluster, key=lambda p: len(p.name))
 
 
+def _unlink(path: Path) -> bool:
+    try:
+        path.unlink()
+        return True
+    except Exception:
+        return False
+
+
+def delete_files(paths: List[Path], max_workers: int = 16) -> tuple[int, int]:
+    """Deletes paths on a thread pool and returns (deleted, failed) counts.
+
+    unlink is latency bound on filesystem metadata and releases the GIL, so
+    threads keep many deletes in flight at once.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            tqdm(executor.map(_unlink, paths), total=len(paths), desc="deleting")
+        )
+    deleted = sum(results)
+    return deleted, len(results) - deleted
+
+
 def apply_threshold(
     image_dir: str,
     threshold: int,
     hash_size: int = 8,
-    preprocess: bool = True,
     extensions: Iterable[str] = None,
     delete: bool = False,
 ) -> Dict[str, Any]:
@@ -80,20 +268,11 @@ def apply_threshold(
     Returns a dict with keys: `threshold`, `clusters`, `to_delete`, `to_keep`,
     `deleted_count`, `failed_delete_count`.
     """
-    if extensions is None:
-        exts = EXTENSIONS
-    else:
-        exts = set(extensions)
-
     image_dir = Path(image_dir).expanduser()
     if not image_dir.is_dir():
         raise NotADirectoryError(f"Directory not found: {image_dir}")
 
-    files = []
-    for ext in exts:
-        files.extend(image_dir.glob(f"*{ext}"))
-    files = [f for f in files if not f.name.startswith("._")]
-    files = sorted(files)
+    files = list_images(image_dir, extensions)
 
     if len(files) < 2:
         return {
@@ -105,21 +284,17 @@ def apply_threshold(
             "failed_delete_count": 0,
         }
 
-    # compute hashes
-    hashes: Dict[Path, Any] = {}
-    for f in tqdm(files, desc="hashing"):
-        h = compute_dhash(f, hash_size=hash_size, preprocess=preprocess)
-        if h is not None:
-            hashes[f] = h
-
-    files_list = list(hashes.keys())
+    # decode every image to its tiny grayscale grid, then hash them in one batch
+    hash_inputs = load_hash_inputs(files, hash_size=hash_size)
 
+    files_list = list(hash_inputs.keys())
     pairs = []
-    for i in range(len(files_list)):
-        for j in range(i + 1, len(files_list)):
-            d = hashes[files_list[i]] - hashes[files_list[j]]
-            if d <= threshold:
-                pairs.append((files_list[i], files_list[j]))
+    if files_list:
+        hashes = batched_dhash(np.stack(list(hash_inputs.values())))
+        pairs = [
+            (files_list[i], files_list[j])
+            for i, j in hamming_pairs(hashes, threshold, hash_bits=hash_size**2)
+        ]
 
     clusters = find_connected_components(pairs)
 
@@ -135,12 +310,7 @@ def apply_threshold(
     deleted = 0
     failed_del = 0
     if delete and to_delete:
-        for p in tqdm(to_delete, desc="deleting"):
-            try:
-                p.unlink()
-                deleted += 1
-            except Exception:
-                failed_del += 1
+        deleted, failed_del = delete_files(to_delete)
 
     return {
         "threshold": threshold,
@@ -1,11 +1,14 @@
 from __future__ import annotations
 import argparse
-import json
+import os
 import re
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List
-import matplotlib.pyplot as plt
-from PIL import Image
+import tkinter as tk
+import orjson
+from PIL import Image, ImageTk
 import importlib.util
 from datetime import date
 
@@ -14,8 +17,7 @@ def load_images(json_path: Path) -> List[Dict[str, Any]]:
     """Loads an image list from a JSON file."""
     if not json_path.is_file():
         raise FileNotFoundError(f"Image JSON file not found: {json_path}")
-    with open(json_path, "r") as f:
-        data = json.load(f)
+    data = orjson.loads(json_path.read_bytes())
     return (
         data.get("images", [])
         if isinstance(data, dict)
@@ -25,14 +27,32 @@ def load_images(json_path: Path) -> List[Dict[str, Any]]:
     )
 
 
+_DIGITS_RE = re.compile(r"(\d+)")
+
+
+@lru_cache(maxsize=None)
 def natural_key(text: str) -> tuple:
     """Provides a key for natural sorting of strings containing numbers."""
     return tuple(
-        int(part) if part.isdigit() else part.lower()
-        for part in re.split(r"(\d+)", text)
+        int(part) if part.isdigit() else part.lower() for part in _DIGITS_RE.split(text)
     )
 
 
+def filename_sort_key(img: Dict[str, Any]) -> tuple:
+    """Sorts images naturally by filename."""
+    return natural_key(img.get("filename", ""))
+
+
+def date_sort_key(img: Dict[str, Any]) -> tuple:
+    """Sorts images by capture date, then naturally by filename."""
+    ts = img.get("timestamp") or img.get("date")
+    try:
+        day = date.fromisoformat(str(ts)[:10])
+    except (ValueError, TypeError):
+        day = date.max
+    return (day, natural_key(img.get("filename", "")))
+
+
 def load_delete_helpers():
     """Dynamically loads the delete_helpers.py module if available."""
     try:
@@ -49,9 +69,40 @@ def load_delete_helpers():
 
 DELETE_HELPER = load_delete_helpers()
 
+# Decoded neighbours further than this from the current index are dropped.
+CACHE_WINDOW = 3
+
+# Reviewer window size; decoded images are capped to the area below the title.
+WINDOW_SIZE = (1000, 800)
+DISPLAY_SIZE = (1000, 760)
+
+# Decodes in flight at most: the current image and its two neighbours.
+DECODE_WORKERS = 2
+
+
+def load_display_image(path: Path) -> Image.Image:
+    """Decodes an image to RGB no larger than DISPLAY_SIZE."""
+    with Image.open(path) as img:
+        # draft() lets JPEGs decode at a reduced scale; other formats
+        # ignore it and are only downscaled after loading.
+        img.draft("RGB", DISPLAY_SIZE)
+        img.thumbnail(DISPLAY_SIZE, Image.Resampling.BILINEAR)
+        return img.convert("RGB")
+
 
 class ImageReviewer:
-    """A matplotlib-based GUI to review images and mark them for deletion."""
+    """A Tk GUI to review images and mark them for deletion."""
+
+    # Key bindings by lowercased Tk keysym, resolved to method names once.
+    _KEY_MAP = {
+        "up": "mark_keep",
+        "down": "mark_delete",
+        "right": "next_image",
+        "left": "prev_image",
+        "q": "finish",
+        "escape": "finish",
+    }
+    _CONFIRM_KEY_MAP = {"y": True, "return": True, "n": False, "escape": False}
 
     def __init__(
         self, images: List[Dict[str, Any]], base_dir: Path, json_path: Path, **kwargs
@@ -64,60 +115,131 @@ class ImageReviewer:
         self.auto_confirm = kwargs.get("auto_confirm", False)
         self.index = 0
         self.decisions = ["keep"] * len(images)
-        self.fig, self.ax = plt.subplots(figsize=(10, 8))
-        self.fig.canvas.manager.set_window_title("Image Reviewer")
-        self.fig.canvas.mpl_connect("key_press_event", self.on_key)
+        self.confirm_buttons = None
+        self.deletion_confirmed = False
+        # Filled by collect_marks() once the review is finished.
+        self.marked_images: List[Dict[str, Any]] = []
+        self.marked_count = 0
+        self.to_delete: List[Path] = []
+        # Joining onto base_dir leaves absolute paths as they are.
+        self.image_paths = [
+            base_dir / (img.get("path") or img.get("thumbnail") or "") for img in images
+        ]
+        # Pending or finished decodes by index, so stepping to a neighbour
+        # doesn't wait on disk and decode on the event loop. Decoding runs in
+        # worker processes so it never competes with drawing for the GIL.
+        self._cache: Dict[int, Future] = {}
+        self._decoder = ProcessPoolExecutor(max_workers=DECODE_WORKERS)
+        # Each decision is appended to a JSONL log next to the output file so
+        # an interrupted review can pick up where it stopped.
+        self.marks_log = None
+        if self.output_path:
+            self.marks_log_path = Path(self.output_path).with_suffix(".jsonl")
+            torn = self.resume_marks()
+            self.marks_log = open(self.marks_log_path, "ab")
+            if torn:
+                self.marks_log.write(b"\n")
+        self.root = tk.Tk()
+        self.root.title("Image Reviewer")
+        self.root.geometry(f"{WINDOW_SIZE[0]}x{WINDOW_SIZE[1]}")
+        self.root.configure(bg="white")
+        self.status_label = tk.Label(self.root, bg="white", font=("TkDefaultFont", 14))
+        self.status_label.pack(side=tk.TOP, fill=tk.X)
+        # The label shows either the current image or an error message.
+        self.image_label = tk.Label(self.root, bg="white", compound=tk.CENTER)
+        self.image_label.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.photo = None
+        self.root.bind("<Key>", self.on_key)
         self.update_display()
 
+    def resume_marks(self) -> bool:
+        """Restores decisions logged by an earlier, unfinished session.
+
+        Returns True if the log ends in a partial line that new entries must
+        not be appended to.
+        """
+        if not self.marks_log_path.is_file():
+            return False
+        data = self.marks_log_path.read_bytes()
+        positions = {str(path): i for i, path in enumerate(self.image_paths)}
+        restored, last = 0, None
+        for line in data.splitlines():
+            try:
+                entry = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue  # a line cut short by the interruption
+            index = positions.get(entry.get("path"))
+            if index is not None:
+                self.decisions[index] = entry["decision"]
+                restored, last = restored + 1, index
+        if last is not None:
+            self.index = min(last + 1, len(self.images) - 1)
+            print(f"Resumed {restored} decisions from {self.marks_log_path}")
+        return bool(data) and not data.endswith(b"\n")
+
+    def request_image(self, index: int) -> Future:
+        """Returns the cached decode for an index, starting it if needed."""
+        future = self._cache.get(index)
+        if future is None:
+            future = self._decoder.submit(load_display_image, self.image_paths[index])
+            self._cache[index] = future
+        return future
+
+    def prefetch_neighbours(self):
+        """Queues decodes either side of the current image and evicts far ones."""
+        for index in [i for i in self._cache if abs(i - self.index) > CACHE_WINDOW]:
+            self._cache.pop(index).cancel()
+        for index in (self.index + 1, self.index - 1):
+            if 0 <= index < len(self.images):
+                self.request_image(index)
+
     def update_display(self):
-        """Renders the current image and its status in the matplotlib window."""
-        self.ax.clear()
+        """Renders the current image and its status in the reviewer window."""
+        message = ""
         if not self.images:
-            self.ax.text(0.5, 0.5, "No images to review.", ha="center", va="center")
+            message = "No images to review."
         else:
-            img_data = self.images[self.index]
-            path_str = img_data.get("path") or img_data.get("thumbnail") or ""
-            img_path = (
-                self.base_dir / path_str
-                if not Path(path_str).is_absolute()
-                else Path(path_str)
-            )
-
+            future = self.request_image(self.index)
+            self.prefetch_neighbours()
             try:
-                with Image.open(img_path) as img:
-                    self.ax.imshow(img)
+                # Keep a reference; Tk drops images that are garbage collected.
+                self.photo = ImageTk.PhotoImage(future.result())
             except Exception as e:
-                self.ax.text(
-                    0.5,
-                    0.5,
-                    f"Error opening {img_path.name}:\n{e}",
-                    ha="center",
-                    va="center",
-                )
+                message = f"Error opening {self.image_paths[self.index].name}:\n{e}"
+        if message:
+            self.photo = None
+        self.image_label.configure(image=self.photo or "", text=message)
 
         status = self.decisions[self.index]
         title = f"{self.index + 1}/{len(self.images)} | {'DELETE' if status == 'delete' else 'KEEP'}"
-        self.ax.set_title(title, color="red" if status == "delete" else "green")
-        self.ax.axis("off")
-        self.fig.canvas.draw_idle()
+        self.status_label.configure(
+            text=title, fg="red" if status == "delete" else "green"
+        )
 
     def on_key(self, event: Any):
         """Handles key press events for navigation and marking."""
-        key_map = {
-            "up": lambda: self.mark("keep"),
-            "down": lambda: self.mark("delete"),
-            "right": self.next_image,
-            "left": self.prev_image,
-            "q": self.finish,
-            "escape": self.finish,
-        }
-        if event.key in key_map:
-            key_map[event.key]()
+        key = event.keysym.lower()
+        if self.confirm_buttons:
+            if key in self._CONFIRM_KEY_MAP:
+                self.close(self._CONFIRM_KEY_MAP[key])
+            return
+        if key in self._KEY_MAP:
+            getattr(self, self._KEY_MAP[key])()
 
     def mark(self, decision: str):
         self.decisions[self.index] = decision
+        if self.marks_log:
+            entry = {"path": str(self.image_paths[self.index]), "decision": decision}
+            self.marks_log.write(orjson.dumps(entry) + b"\n")
+            self.marks_log.flush()
         self.next_image()
 
+    def mark_keep(self):
+        self.mark("keep")
+
+    def mark_delete(self):
+        self.mark("delete")
+
     def next_image(self):
         if self.index < len(self.images) - 1:
             self.index += 1
@@ -131,50 +253,79 @@ class ImageReviewer:
             self.update_display()
 
     def finish(self):
-        """Saves results, optionally applies deletions, and closes the viewer."""
-        plt.close(self.fig)
+        """Saves results and closes the viewer, asking first if files will go."""
+        if self.confirm_buttons:
+            return
+        self._decoder.shutdown(cancel_futures=True)
+        self.collect_marks()
         if self.output_path:
             self.save_marks()
-        if self.apply_deletions:
-            self.apply_deletions_now()
+            # The full marks file now supersedes the resume log.
+            self.marks_log.close()
+            self.marks_log_path.unlink(missing_ok=True)
+        if self.apply_deletions and not self.auto_confirm and self.to_delete:
+            self.show_confirm()
+        else:
+            self.close(self.apply_deletions)
+
+    def show_confirm(self):
+        """Replaces the image with Delete/Cancel buttons for the marked files."""
+        self.photo = None
+        self.image_label.configure(
+            image="", text=f"Delete {len(self.to_delete)} files?"
+        )
+        self.status_label.configure(text="Confirm deletion (y / n)", fg="red")
+        buttons = tk.Frame(self.root, bg="white")
+        buttons.pack(side=tk.BOTTOM, pady=20)
+        self.confirm_buttons = (
+            tk.Button(buttons, text="Delete", command=lambda: self.close(True)),
+            tk.Button(buttons, text="Cancel", command=lambda: self.close(False)),
+        )
+        for button in self.confirm_buttons:
+            button.pack(side=tk.LEFT, padx=20)
+
+    def close(self, confirmed: bool):
+        """Closes the viewer; run() applies deletions once the event loop exits."""
+        self.deletion_confirmed = confirmed
+        if self.confirm_buttons and not confirmed:
+            print("Deletion cancelled.")
+        self.root.destroy()
+
+    def collect_marks(self):
+        """Gathers the saved marks, delete count and files to delete in one pass."""
+        self.marked_images, self.marked_count, self.to_delete = [], 0, []
+        for img, dec in zip(self.images, self.decisions):
+            delete = dec == "delete"
+            self.marked_images.append(dict(img, delete=delete))
+            if delete:
+                self.marked_count += 1
+                if img.get("path"):
+                    self.to_delete.append(self.base_dir / img["path"])
 
     def save_marks(self):
         """Saves the review decisions to the specified output JSON file."""
-        to_delete_count = sum(1 for d in self.decisions if d == "delete")
+        to_delete_count = self.marked_count
         payload = {
             "metadata": {
                 "total": len(self.images),
                 "marked_for_deletion": to_delete_count,
             },
-            "images": [
-                dict(img, delete=(dec == "delete"))
-                for img, dec in zip(self.images, self.decisions)
-            ],
+            "images": self.marked_images,
         }
-        with open(self.output_path, "w") as f:
-            json.dump(payload, f, indent=2)
+        Path(self.output_path).write_bytes(
+            orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+        )
         print(
             f"\nSaved decisions for {to_delete_count} deletions to {self.output_path}"
         )
 
     def apply_deletions_now(self):
         """Applies the deletions based on the review session."""
-        to_delete = [
-            self.base_dir / (img.get("path") or "")
-            for img, dec in zip(self.images, self.decisions)
-            if dec == "delete" and (img.get("path"))
-        ]
+        to_delete = self.to_delete
         if not to_delete:
             print("\nNo files marked for deletion.")
             return
 
-        if (
-            not self.auto_confirm
-            and input(f"\nDelete {len(to_delete)} files? [y/N]: ").lower() != "y"
-        ):
-            print("Deletion cancelled.")
-            return
-
         if DELETE_HELPER:
             print(f"Using delete helper to update {self.json_path} and delete files.")
             res = DELETE_HELPER.remove_paths_from_image_json(
@@ -187,11 +338,22 @@ class ImageReviewer:
                 f"Removed from JSON: {res['removed_from_json']}, Deleted: {res['deleted_files']}, Missing: {res['missing_files']}"
             )
         else:
-            deleted = sum(1 for path in to_delete if path.unlink(missing_ok=True))
+            deleted = 0
+            # Sorting groups the unlinks by directory.
+            for path in sorted(to_delete):
+                try:
+                    os.unlink(path)
+                    deleted += 1
+                except FileNotFoundError:
+                    pass
             print(f"\nDeleted {deleted} file(s).")
 
     def run(self):
-        plt.show()
+        self.root.mainloop()
+        self._decoder.shutdown(cancel_futures=True)
+        # Deleting after the window closes keeps it off the GUI event loop.
+        if self.deletion_confirmed:
+            self.apply_deletions_now()
 
 
 def main():
@@ -235,24 +397,21 @@ def main():
     if not images:
         raise SystemExit("No images found in JSON file.")
 
-    def sort_key(img):
-        if args.sort_by == "date":
-            ts = img.get("timestamp") or img.get("date")
-            try:
-                return (
-                    date.fromisoformat(str(ts)[:10]),
-                    natural_key(img.get("filename", "")),
-                )
-            except (ValueError, TypeError):
-                return (date.max, natural_key(img.get("filename", "")))
-        return natural_key(img.get("filename", ""))
-
-    images.sort(key=sort_key)
+    # list.sort already evaluates key once per image, so choose the key
+    # function up front rather than branching on --sort-by inside it.
+    images.sort(key=date_sort_key if args.sort_by == "date" else filename_sort_key)
 
     print(f"Found {len(images)} images. Launching reviewer...")
     print("Controls: ↓ delete | ↑ keep | ← previous | → next | q quit")
 
-    reviewer = ImageReviewer(images, base_dir, json_path, **vars(args))
+    reviewer = ImageReviewer(
+        images,
+        base_dir,
+        json_path,
+        output_path=args.output,
+        apply_deletions=args.apply_deletions,
+        auto_confirm=args.yes,
+    )
     reviewer.run()
 
 
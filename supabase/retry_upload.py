@@ -1,11 +1,42 @@
 import argparse
-import json
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 from typing import List
-from supabase import create_client, Client
+
+import httpx
+import orjson
+from supabase import ClientOptions, create_client, Client
 from tqdm import tqdm
 
+# Matches storage3's default client timeout
+STORAGE_TIMEOUT = 20
+
+
+def create_http_client(pool_size: int, retries: int) -> httpx.Client:
+    """Returns a keep-alive HTTP/2 client pooled for `pool_size` concurrent uploads.
+
+    The transport retries failed connection attempts `retries` times; errors
+    after a request has been sent are left to the caller.
+    """
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=retries,
+        limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        ),
+    )
+    return httpx.Client(
+        transport=transport, timeout=STORAGE_TIMEOUT, follow_redirects=True
+    )
+
+
+@lru_cache(maxsize=8)
+def bucket_handle(supabase: Client, bucket: str):
+    """Returns a reusable storage handle; retries only ever touch a few buckets."""
+    return supabase.storage.from_(bucket)
+
 
 def upload_file_with_retry(
     supabase: Client,
@@ -16,17 +47,23 @@ def upload_file_with_retry(
     max_retries: int,
     retry_delay: float,
 ):
-    """Uploads a file to Supabase Storage with exponential backoff on failure."""
+    """Uploads a file to Supabase Storage with exponential backoff on failure.
+
+    Connection failures are already retried by the HTTP transport, so only
+    errors returned by the server are retried here.
+    """
     for attempt in range(max_retries):
         try:
             with open(local_path, "rb") as f:
                 # Use upsert=True to either create or overwrite the file.
-                supabase.storage.from_(bucket).upload(
+                bucket_handle(supabase, bucket).upload(
                     path=storage_path.lstrip("/"),
                     file=f,
                     file_options={"upsert": True, "content-type": content_type},
                 )
             return True, None
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            return False, f"Connection error: {e}"
         except Exception as e:
             error_msg = str(e)
             if "403" in error_msg or "unauthorized" in error_msg.lower():
@@ -41,15 +78,20 @@ def upload_file_with_retry(
 
 
 def retry_failed_uploads(
-    failed_uploads_file: Path, supabase: Client, max_retries: int, retry_delay: float
+    failed_uploads_file: Path,
+    supabase: Client,
+    max_retries: int,
+    retry_delay: float,
+    concurrency: int = 16,
 ):
     """Retries uploading files listed in the failed uploads JSON file."""
     if not failed_uploads_file.is_file():
         print(f"Error: Failed uploads file not found: {failed_uploads_file}")
         return 1
 
-    with open(failed_uploads_file, "r") as f:
-        failed_uploads = json.load(f).get("failed_uploads", [])
+    failed_uploads = orjson.loads(failed_uploads_file.read_bytes()).get(
+        "failed_uploads", []
+    )
 
     if not failed_uploads:
         print("No failed uploads to retry.")
@@ -58,27 +100,42 @@ def retry_failed_uploads(
     print(f"Retrying {len(failed_uploads)} failed uploads...")
 
     still_failed = []
-    for item in tqdm(failed_uploads, desc="Retrying uploads", unit="file"):
-        local_path = Path(item["local_path"])
-        if not local_path.is_file():
-            still_failed.append(item)
-            continue
-
-        success, _ = upload_file_with_retry(
-            supabase,
-            item["bucket"],
-            local_path,
-            item["storage_path"],
-            item.get("content_type", "image/webp"),
-            max_retries,
-            retry_delay,
-        )
-        if not success:
-            still_failed.append(item)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        for item in failed_uploads:
+            local_path = Path(item["local_path"])
+            if not local_path.is_file():
+                still_failed.append(item)
+                continue
+            future = executor.submit(
+                upload_file_with_retry,
+                supabase,
+                item["bucket"],
+                local_path,
+                item["storage_path"],
+                item.get("content_type", "image/webp"),
+                max_retries,
+                retry_delay,
+            )
+            pending[future] = item
+
+        for future in tqdm(
+            as_completed(pending),
+            total=len(pending),
+            desc="Retrying uploads",
+            unit="file",
+        ):
+            success, error = future.result()
+            if not success:
+                still_failed.append(pending[future])
+                tqdm.write(
+                    f"✗ Failed to upload {pending[future]['local_path']}: {error}"
+                )
 
     if still_failed:
-        with open(failed_uploads_file, "w") as f:
-            json.dump({"failed_uploads": still_failed}, f, indent=2)
+        failed_uploads_file.write_bytes(
+            orjson.dumps({"failed_uploads": still_failed}, option=orjson.OPT_INDENT_2)
+        )
         print(
             f"\n{len(still_failed)} file(s) still failed. Updated {failed_uploads_file}"
         )
@@ -159,21 +216,36 @@ def main():
         default=2.0,
         help="Initial delay between retries in seconds.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Number of retries to run in parallel.",
+    )
     args = parser.parse_args()
 
-    try:
-        supabase = create_client(args.supabase_url, args.supabase_key)
-    except Exception as e:
-        print(f"Error initializing Supabase client: {e}")
-        return 1
+    # One keep-alive HTTP/2 pool shared by every retry thread
+    with create_http_client(args.concurrency, args.max_retries) as http_client:
+        try:
+            supabase = create_client(
+                args.supabase_url,
+                args.supabase_key,
+                options=ClientOptions(httpx_client=http_client),
+            )
+        except Exception as e:
+            print(f"Error initializing Supabase client: {e}")
+            return 1
 
-    if args.file:
-        return upload_single_files(
-            args.file, supabase, args.max_retries, args.retry_delay
-        )
-    else:
+        if args.file:
+            return upload_single_files(
+                args.file, supabase, args.max_retries, args.retry_delay
+            )
         return retry_failed_uploads(
-            Path(args.failed_uploads_file), supabase, args.max_retries, args.retry_delay
+            Path(args.failed_uploads_file),
+            supabase,
+            args.max_retries,
+            args.retry_delay,
+            args.concurrency,
         )
 
 
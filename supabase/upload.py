@@ -1,113 +1,155 @@
 import argparse
-import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from supabase import create_client, Client
+
+import httpx
+import orjson
+from supabase import ClientOptions, create_client, Client
 from tqdm import tqdm
 
+# Matches storage3's default client timeout
+STORAGE_TIMEOUT = 20
 
-def upload_file(
-    supabase: Client, bucket: str, local_path: Path, storage_path: str, upsert: bool
-):
-    """Uploads a single file to a Supabase storage bucket."""
+# Connection attempts per upload before it is recorded in failed_uploads.json
+CONNECT_RETRIES = 3
+
+# httpx streams file objects in chunks of this size; anything smaller is sent
+# as one bytes payload without the extra stat/seek/read round trips.
+SMALL_FILE_BYTES = 64 * 1024
+
+# Objects requested per storage listing call
+LIST_PAGE_SIZE = 1000
+
+
+def create_http_client(pool_size: int, retries: int) -> httpx.Client:
+    """Returns a keep-alive HTTP/2 client pooled for `pool_size` concurrent uploads.
+
+    The transport retries failed connection attempts `retries` times; errors
+    after a request has been sent are left to the caller.
+    """
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=retries,
+        limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        ),
+    )
+    return httpx.Client(
+        transport=transport, timeout=STORAGE_TIMEOUT, follow_redirects=True
+    )
+
+
+def upload_file(handle, local_path: Path, storage_path: str, upsert: bool):
+    """Uploads a single file through a Supabase storage bucket handle.
+
+    Returns (success, error message) instead of printing, since this runs on
+    upload threads underneath a progress bar.
+    """
     try:
+        content_type = (
+            "application/json" if local_path.suffix == ".json" else "image/webp"
+        )
         with open(local_path, "rb") as f:
-            content_type = (
-                "application/json" if local_path.suffix == ".json" else "image/webp"
-            )
-            supabase.storage.from_(bucket).upload(
+            if local_path.stat().st_size < SMALL_FILE_BYTES:
+                file = f.read()
+            else:
+                file = f
+            handle.upload(
                 path=storage_path.lstrip("/"),
-                file=f,
+                file=file,
                 file_options={"upsert": upsert, "content-type": content_type},
             )
-        return True
+        return True, None
     except Exception as e:
-        print(f"Error uploading {local_path.name}: {e}")
-        return False
+        return False, str(e)
+
+
+def list_existing(handle) -> set:
+    """Returns the names of all objects at the root of a storage bucket."""
+    names = set()
+    offset = 0
+    while True:
+        page = handle.list(options={"limit": LIST_PAGE_SIZE, "offset": offset})
+        names.update(obj["name"] for obj in page)
+        if len(page) < LIST_PAGE_SIZE:
+            return names
+        offset += LIST_PAGE_SIZE
 
 
 def upload_directory(
-    supabase: Client, bucket: str, local_dir: Path, files: set, upsert: bool, desc: str
+    supabase: Client,
+    bucket: str,
+    local_dir: Path,
+    files: set,
+    upsert: bool,
+    desc: str,
+    concurrency: int = 16,
 ):
     """Uploads all files from a local directory to a Supabase bucket."""
     if not local_dir.is_dir():
         print(f"Warning: Directory not found, skipping: {local_dir}")
-        return 0, len(files)
+        return []
 
-    success_count, fail_count = 0, 0
+    success_count, skip_count, fail_count = 0, 0, 0
     failed_uploads = []
+    handle = supabase.storage.from_(bucket)
 
-    for filename in tqdm(files, desc=desc, unit="file"):
-        local_path = local_dir / filename
-        if not local_path.is_file():
-            fail_count += 1
-            continue
-
-        if upload_file(supabase, bucket, local_path, filename, upsert):
-            success_count += 1
-        else:
-            fail_count += 1
-            failed_uploads.append(
-                {
-                    "bucket": bucket,
-                    "local_path": str(local_path),
-                    "storage_path": filename,
-                }
-            )
+    # Without upsert the server rejects existing objects anyway, so list the
+    # bucket once rather than sending each of those files just to fail.
+    existing = set()
+    if not upsert:
+        try:
+            existing = list_existing(handle)
+        except Exception as e:
+            print(f"Warning: Could not list bucket {bucket}, uploading all: {e}")
 
-    print(f"{desc}: {success_count} successful, {fail_count} failed.")
-    return failed_uploads
+    # Uploads are latency bound, so keep `concurrency` requests in flight and
+    # tally results on this thread as they complete.
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        for filename in files:
+            local_path = local_dir / filename
+            if not local_path.is_file():
+                fail_count += 1
+                continue
+            if filename in existing:
+                skip_count += 1
+                continue
+            future = executor.submit(upload_file, handle, local_path, filename, upsert)
+            pending[future] = filename
 
+        for future in tqdm(
+            as_completed(pending), total=len(pending), desc=desc, unit="file"
+        ):
+            filename = pending[future]
+            success, error = future.result()
+            if success:
+                success_count += 1
+            else:
+                fail_count += 1
+                tqdm.write(f"Error uploading {filename}: {error}")
+                failed_uploads.append(
+                    {
+                        "bucket": bucket,
+                        "local_path": str(local_dir / filename),
+                        "storage_path": filename,
+                    }
+                )
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Upload web-exported assets to Supabase Storage."
-    )
-    parser.add_argument(
-        "--web-export-dir",
-        type=str,
-        default="frontend/web_export",
-        help="Directory of web-exported files.",
-    )
-    parser.add_argument(
-        "--supabase-url", type=str, required=True, help="Supabase project URL."
+    print(
+        f"{desc}: {success_count} successful, {skip_count} already uploaded, "
+        f"{fail_count} failed."
     )
-    parser.add_argument(
-        "--supabase-key", type=str, required=True, help="Supabase service role key."
-    )
-    parser.add_argument(
-        "--images-bucket", type=str, default="images", help="Bucket for main images."
-    )
-    parser.add_argument(
-        "--thumbnails-bucket",
-        type=str,
-        default="thumbnails",
-        help="Bucket for thumbnails.",
-    )
-    parser.add_argument(
-        "--data-bucket", type=str, default="data", help="Bucket for image_data.json."
-    )
-    parser.add_argument(
-        "--no-overwrite",
-        action="store_true",
-        help="Prevent overwriting existing files.",
-    )
-    args = parser.parse_args()
-
-    web_export_dir = Path(args.web_export_dir).expanduser()
-    image_data_path = web_export_dir / "image_data.json"
+    return failed_uploads
 
-    if not image_data_path.is_file():
-        print(f"Error: image_data.json not found in {web_export_dir}")
-        return 1
 
-    try:
-        supabase = create_client(args.supabase_url, args.supabase_key)
-    except Exception as e:
-        print(f"Error initializing Supabase client: {e}")
-        return 1
+def upload_web_export(
+    supabase: Client, args: argparse.Namespace, web_export_dir: Path
+) -> int:
+    """Uploads images, thumbnails and the rewritten image_data.json."""
+    image_data_path = web_export_dir / "image_data.json"
 
-    with open(image_data_path, "r") as f:
-        image_data = json.load(f)
+    image_data = orjson.loads(image_data_path.read_bytes())
     images = image_data.get("images", [])
     if not images:
         print("No images found in JSON file.")
@@ -118,8 +160,20 @@ def main():
     upsert = not args.no_overwrite
     all_failed_uploads = []
 
+    # Collect upload names and point entries at their Supabase buckets in one
+    # pass; the rewritten JSON is only saved after the uploads below.
+    image_files, thumbnail_files = set(), set()
+    for img in images:
+        if "path" in img:
+            name = Path(img["path"]).name
+            image_files.add(name)
+            img["path"] = f"{args.images_bucket}/{name}"
+        if "thumbnail" in img:
+            name = Path(img["thumbnail"]).name
+            thumbnail_files.add(name)
+            img["thumbnail"] = f"{args.thumbnails_bucket}/{name}"
+
     # Upload main images
-    image_files = {Path(img["path"]).name for img in images if "path" in img}
     failed = upload_directory(
         supabase,
         args.images_bucket,
@@ -127,13 +181,11 @@ def main():
         image_files,
         upsert,
         "Uploading images",
+        args.concurrency,
     )
     all_failed_uploads.extend(failed)
 
     # Upload thumbnails
-    thumbnail_files = {
-        Path(img["thumbnail"]).name for img in images if "thumbnail" in img
-    }
     failed = upload_directory(
         supabase,
         args.thumbnails_bucket,
@@ -141,29 +193,26 @@ def main():
         thumbnail_files,
         upsert,
         "Uploading thumbnails",
+        args.concurrency,
     )
     all_failed_uploads.extend(failed)
 
-    # Update paths in image_data.json for Supabase
-    for img in image_data["images"]:
-        if "path" in img:
-            img["path"] = f"{args.images_bucket}/{Path(img['path']).name}"
-        if "thumbnail" in img:
-            img["thumbnail"] = f"{args.thumbnails_bucket}/{Path(img['thumbnail']).name}"
-
     # Save and upload the updated JSON
     supabase_json_path = web_export_dir / "image_data_supabase.json"
-    with open(supabase_json_path, "w") as f:
-        json.dump(image_data, f, indent=2)
+    supabase_json_path.write_bytes(orjson.dumps(image_data, option=orjson.OPT_INDENT_2))
 
     print("\nUploading image_data.json...")
-    if upload_file(
-        supabase, args.data_bucket, supabase_json_path, "image_data.json", upsert
-    ):
+    success, error = upload_file(
+        supabase.storage.from_(args.data_bucket),
+        supabase_json_path,
+        "image_data.json",
+        upsert,
+    )
+    if success:
         print("✓ Successfully uploaded image_data.json.")
         print(f"✓ Updated JSON for Supabase saved locally to {supabase_json_path}")
     else:
-        print("✗ Failed to upload image_data.json.")
+        print(f"✗ Failed to upload image_data.json: {error}")
         all_failed_uploads.append(
             {
                 "bucket": args.data_bucket,
@@ -175,8 +224,11 @@ def main():
     # Save failed uploads if any
     if all_failed_uploads:
         failed_uploads_file = Path("failed_uploads.json")
-        with open(failed_uploads_file, "w") as f:
-            json.dump({"failed_uploads": all_failed_uploads}, f, indent=2)
+        failed_uploads_file.write_bytes(
+            orjson.dumps(
+                {"failed_uploads": all_failed_uploads}, option=orjson.OPT_INDENT_2
+            )
+        )
         print(
             f"\n{len(all_failed_uploads)} failed uploads saved to {failed_uploads_file}."
         )
@@ -187,5 +239,68 @@ def main():
     return 0
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="Upload web-exported assets to Supabase Storage."
+    )
+    parser.add_argument(
+        "--web-export-dir",
+        type=str,
+        default="frontend/web_export",
+        help="Directory of web-exported files.",
+    )
+    parser.add_argument(
+        "--supabase-url", type=str, required=True, help="Supabase project URL."
+    )
+    parser.add_argument(
+        "--supabase-key", type=str, required=True, help="Supabase service role key."
+    )
+    parser.add_argument(
+        "--images-bucket", type=str, default="images", help="Bucket for main images."
+    )
+    parser.add_argument(
+        "--thumbnails-bucket",
+        type=str,
+        default="thumbnails",
+        help="Bucket for thumbnails.",
+    )
+    parser.add_argument(
+        "--data-bucket", type=str, default="data", help="Bucket for image_data.json."
+    )
+    parser.add_argument(
+        "--no-overwrite",
+        action="store_true",
+        help="Prevent overwriting existing files.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Number of uploads to run in parallel.",
+    )
+    args = parser.parse_args()
+
+    web_export_dir = Path(args.web_export_dir).expanduser()
+    image_data_path = web_export_dir / "image_data.json"
+
+    if not image_data_path.is_file():
+        print(f"Error: image_data.json not found in {web_export_dir}")
+        return 1
+
+    # One keep-alive HTTP/2 pool shared by every upload thread
+    with create_http_client(args.concurrency, CONNECT_RETRIES) as http_client:
+        try:
+            supabase = create_client(
+                args.supabase_url,
+                args.supabase_key,
+                options=ClientOptions(httpx_client=http_client),
+            )
+        except Exception as e:
+            print(f"Error initializing Supabase client: {e}")
+            return 1
+
+        return upload_web_export(supabase, args, web_export_dir)
+
+
 if __name__ == "__main__":
     exit(main())
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "preprocessing"))
+
+from remove_duplicates import (  # noqa: E402
+    batched_dhash,
+    bucket_candidates,
+    hamming_distances,
+)
+
+
+def random_grids(n: int, hash_size: int, seed: int = 0) -> np.ndarray:
+    """Random dhash grids with near-duplicates of the first quarter mixed in."""
+    rng = np.random.default_rng(seed)
+    grids = rng.integers(0, 256, (n, hash_size, hash_size + 1), dtype=np.uint8)
+    for k in range(n // 4):
+        near = grids[k].copy()
+        flips = rng.integers(0, near.size, rng.integers(0, 6))
+        near.flat[flips] = rng.integers(0, 256, len(flips), dtype=np.uint8)
+        grids[n - 1 - k] = near
+    return grids
+
+
+def brute_force(grids: np.ndarray, threshold: int) -> set:
+    bits = (grids[:, :, 1:] > grids[:, :, :-1]).reshape(len(grids), -1)
+    dist = (bits[:, None, :] != bits[None, :, :]).sum(axis=-1)
+    i, j = np.nonzero(np.triu(dist <= threshold, k=1))
+    return {(a, b, dist[a, b]) for a, b in zip(i.tolist(), j.tolist())}
+
+
+@pytest.mark.parametrize("hash_size", [8, 10, 12])
+@pytest.mark.parametrize("threshold", [0, 3, 8])
+def test_hamming_distances_matches_brute_force(hash_size, threshold):
+    grids = random_grids(400, hash_size)
+    hashes = batched_dhash(grids)
+    i, j, d = hamming_distances(hashes, threshold, hash_bits=hash_size**2)
+    found = set(zip(i.tolist(), j.tolist(), d.tolist()))
+    assert found == brute_force(grids, threshold)
+
+
+@pytest.mark.parametrize("hash_size", [10, 12])
+def test_bucket_candidates_ignore_padding(hash_size):
+    # hash_size ** 2 is not a multiple of 64, so the packed words end in
+    # zero padding that must not be used as a shared bucket key.
+    grids = random_grids(400, hash_size)
+    hashes = batched_dhash(grids)
+    i, j = bucket_candidates(hashes, 8, hash_bits=hash_size**2)
+    assert len(i) < 400 * 399 // 2 // 10
+    found = set(zip(i.tolist(), j.tolist()))
+    assert {(a, b) for a, b, _ in brute_force(grids, 8)} <= found